@@ -0,0 +1,137 @@
+# Pencarian order (p,d,q)(P,D,Q,m) ARIMA secara paralel dengan batas waktu.
+# Berbeda dengan auto_arima stepwise yang berjalan satu per satu tanpa batas waktu,
+# di sini semua kandidat order dievaluasi di beberapa proses sekaligus. Kandidat
+# awal stepwise (Hyndman-Khandakar) dievaluasi lebih dulu, lalu sisanya dari order
+# terkecil, sehingga model terbaik-sejauh-ini sudah layak pakai sejak awal. Saat
+# batas waktu habis, proses pekerja dihentikan dan model terbaik yang sudah ada
+# dikembalikan.
+import itertools
+import multiprocessing
+import os
+import queue
+import time
+import warnings
+
+import numpy as np
+from pmdarima.arima import ARIMA, ndiffs, nsdiffs
+
+ARIMA_SEARCH_WORKERS = int(os.environ.get("ARIMA_SEARCH_WORKERS", os.cpu_count() or 1))
+
+# Bila belum ada kandidat yang berhasil saat batas waktu habis, hasil pertama masih
+# ditunggu paling lama sekian detik lagi sebelum pencarian dinyatakan gagal
+FIRST_MODEL_GRACE_SECONDS = float(os.environ.get("ARIMA_SEARCH_GRACE_SECONDS", 60))
+
+# Proses pekerja tidak di-fork langsung dari server Streamlit yang multi-thread,
+# melainkan dari proses forkserver yang sudah memuat modul ini (dan pmdarima)
+_CONTEXT = multiprocessing.get_context('forkserver')
+_CONTEXT.set_forkserver_preload([__name__])
+
+# Batas order sama dengan nilai bawaan auto_arima
+MAX_P = 5
+MAX_Q = 5
+MAX_SEASONAL_P = 2
+MAX_SEASONAL_Q = 2
+MAX_ORDER = 5
+
+# Fungsi untuk menentukan d dan D dengan uji yang sama seperti auto_arima
+def differencing_orders(y, m=1):
+    y = np.asarray(y, dtype=float)
+    D = nsdiffs(y, m=m, test='ocsb', max_D=1) if m > 1 else 0
+    seasonal_diff = y[m:] - y[:-m] if D else y
+    d = ndiffs(seasonal_diff, test='kpss', alpha=0.05, max_d=2)
+    return d, D
+
+# Fungsi untuk menyusun daftar kandidat (order, seasonal_order) berurutan prioritas
+def candidate_orders(d, D=0, m=1):
+    seasonal = m > 1
+    start = [((2, d, 2), (1, D, 1)), ((0, d, 0), (0, D, 0)), ((1, d, 0), (1, D, 0)), ((0, d, 1), (0, D, 1))]
+    grid = []
+    for p, q, P, Q in itertools.product(
+        range(MAX_P + 1), range(MAX_Q + 1),
+        range(MAX_SEASONAL_P + 1 if seasonal else 1), range(MAX_SEASONAL_Q + 1 if seasonal else 1)
+    ):
+        if p + q + P + Q <= MAX_ORDER:
+            grid.append(((p, d, q), (P, D, Q)))
+    grid.sort(key=lambda item: sum(item[0]) + sum(item[1]))
+    candidates = []
+    for order, (P, D_, Q) in start + grid:
+        if not seasonal:
+            P = Q = 0
+        candidate = (order, (P, D_, Q, m if seasonal else 0))
+        if candidate not in candidates:
+            candidates.append(candidate)
+    return candidates
+
+# Fungsi yang dijalankan di proses pekerja: fit satu kandidat, None jika gagal
+def _fit_candidate(y, order, seasonal_order, with_intercept):
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            model = ARIMA(
+                order=order,
+                seasonal_order=seasonal_order,
+                with_intercept=with_intercept,
+                method='lbfgs',
+                maxiter=50,
+                suppress_warnings=True
+            ).fit(y)
+        aic = model.aic()
+        return model if np.isfinite(aic) else None
+    except Exception:
+        return None
+
+# Fungsi untuk mencari model ARIMA terbaik (AIC terkecil) dalam batas waktu
+# time_budget detik. on_progress(selesai, total, model_terbaik) dipanggil di thread
+# pemanggil setiap kali satu kandidat selesai. Mengembalikan (model, ringkasan);
+# model berupa pmdarima ARIMA yang sudah di-fit, sama seperti hasil auto_arima.
+def parallel_auto_arima(y, seasonal=False, m=1, time_budget=60.0, max_workers=None, on_progress=None):
+    started = time.perf_counter()
+    deadline = started + time_budget
+    m = int(m) if seasonal else 1
+    d, D = differencing_orders(y, m)
+    with_intercept = (d + D) in (0, 1)
+    candidates = candidate_orders(d, D, m)
+    workers = max(1, min(max_workers or ARIMA_SEARCH_WORKERS, len(candidates)))
+    
+    results = queue.Queue()
+    best = None
+    done = 0
+    pool = _CONTEXT.Pool(processes=workers)
+    try:
+        for order, seasonal_order in candidates:
+            pool.apply_async(
+                _fit_candidate,
+                (y, order, seasonal_order, with_intercept),
+                callback=results.put,
+                error_callback=lambda _: results.put(None)
+            )
+        while done < len(candidates):
+            # Kandidat yang sedang berjalan tetap ditunggu bila belum ada model sama
+            # sekali, tetapi tidak melewati batas tambahan FIRST_MODEL_GRACE_SECONDS
+            limit = deadline if best is not None else deadline + FIRST_MODEL_GRACE_SECONDS
+            remaining = limit - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                model = results.get(timeout=max(remaining, 0.1))
+            except queue.Empty:
+                break
+            done += 1
+            if model is not None and (best is None or model.aic() < best.aic()):
+                best = model
+            if on_progress is not None:
+                on_progress(done, len(candidates), best)
+    finally:
+        pool.terminate()
+        pool.join()
+    
+    if best is None:
+        raise ValueError("Tidak ada kandidat ARIMA yang berhasil di-fit")
+    summary = {
+        'evaluated': done,
+        'candidates': len(candidates),
+        'expired': done < len(candidates),
+        'workers': workers,
+        'seconds': time.perf_counter() - started
+    }
+    return best, summary
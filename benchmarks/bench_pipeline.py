@@ -0,0 +1,141 @@
+# Benchmark jalur panas fetch -> cache -> statistik -> figure dengan data sintetis
+# dari FixtureProvider (tanpa jaringan), pada ukuran data yang terus membesar.
+#
+#   python benchmarks/bench_pipeline.py                         # 1k s/d 10M bar
+#   python benchmarks/bench_pipeline.py --sizes 1000 100000 --json hasil.json
+#   python benchmarks/bench_pipeline.py --baseline baseline.json --tolerance 0.25
+#
+# Dengan --baseline, exit code 1 jika ada tahap yang lebih lambat dari baseline
+# melebihi toleransi, sehingga regresi bisa ditangkap sebelum deploy.
+from pathlib import Path
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pandas as pd
+
+from charts import create_candlestick_chart, create_price_line_chart
+from data_providers import FIXTURE_EPOCH, FixtureProvider, set_data_provider
+from scraper_engine import BoundedCache, compute_return_stats, request_history
+import risk_metrics
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+
+# Bar sintetis 1m per hari bursa (14:30-21:00 UTC)
+BARS_PER_DAY = 390
+
+RISK_WINDOW = 63
+
+# Selisih waktu di bawah ini dianggap noise dan tidak dihitung sebagai regresi
+MIN_REGRESSION_SECONDS = 0.005
+
+def time_call(fn, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+# Fungsi untuk mengambil tepat n bar 1m sintetis lewat request_history (retry + provider)
+def fetch_bars(n_bars):
+    days = -(-n_bars // BARS_PER_DAY)
+    end = FIXTURE_EPOCH + pd.offsets.BDay(days + 1)
+    return request_history("BENCH", "1m", start=FIXTURE_EPOCH, end=end).iloc[:n_bars]
+
+def bench_size(n_bars, repeat, full_figure_max):
+    results = {}
+    
+    results['fetch'], hist = time_call(lambda: fetch_bars(n_bars), repeat)
+    
+    cache = BoundedCache(max_bytes=16 * 1024 ** 3, ttl=None)
+    results['cache_put'], _ = time_call(lambda: cache.put('BENCH', hist), repeat)
+    lookups = 1000
+    elapsed, _ = time_call(lambda: [cache.get('BENCH') for _ in range(lookups)], repeat)
+    results['cache_get'] = elapsed / lookups
+    
+    bars_per_year = risk_metrics.periods_per_year("1m", hist.index)
+    close = hist['Close']
+    results['return_stats'], _ = time_call(lambda: compute_return_stats(hist, bars_per_year), repeat)
+    results['risk_summary'], _ = time_call(lambda: risk_metrics.risk_summary(close, bars_per_year), repeat)
+    
+    def rolling_metrics():
+        returns = risk_metrics.simple_returns(close)
+        risk_metrics.rolling_volatility(returns, RISK_WINDOW, bars_per_year)
+        risk_metrics.rolling_sharpe(returns, RISK_WINDOW, bars_per_year)
+        risk_metrics.rolling_sortino(returns, RISK_WINDOW, bars_per_year)
+        risk_metrics.rolling_value_at_risk(returns, RISK_WINDOW)
+        risk_metrics.rolling_conditional_value_at_risk(returns, RISK_WINDOW)
+    
+    results['rolling_risk'], _ = time_call(rolling_metrics, repeat)
+    
+    # Figure dengan downsampling (default halaman) dan, untuk data kecil, resolusi penuh
+    results['figure_candles'], _ = time_call(lambda: create_candlestick_chart(hist, "BENCH", 500), repeat)
+    results['figure_line'], _ = time_call(lambda: create_price_line_chart(close, 2000), repeat)
+    if n_bars <= full_figure_max:
+        results['figure_candles_full'], _ = time_call(lambda: create_candlestick_chart(hist, "BENCH"), repeat)
+    return results
+
+# Fungsi untuk membandingkan hasil dengan baseline; mengembalikan daftar regresi
+def find_regressions(results, baseline, tolerance):
+    regressions = []
+    for size, stages in results.items():
+        for stage, seconds in stages.items():
+            reference = baseline.get(size, {}).get(stage)
+            if reference is None:
+                continue
+            if seconds > reference * (1 + tolerance) and seconds - reference > MIN_REGRESSION_SECONDS:
+                regressions.append((size, stage, reference, seconds))
+    return regressions
+
+def format_seconds(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f} ms"
+    return f"{seconds:.2f} s"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark fetch, cache, statistik dan figure pada data sintetis.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Jumlah bar yang diuji")
+    parser.add_argument('--repeat', type=int, default=3, help="Jumlah pengulangan per tahap (diambil median)")
+    parser.add_argument('--full-figure-max', type=int, default=100_000,
+                        help="Ukuran maksimum untuk figure candlestick tanpa downsampling")
+    parser.add_argument('--json', help="Simpan hasil ke file JSON (bisa dipakai sebagai baseline)")
+    parser.add_argument('--baseline', help="File JSON hasil sebelumnya untuk deteksi regresi")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Toleransi perlambatan relatif terhadap baseline")
+    args = parser.parse_args(argv)
+    
+    set_data_provider(FixtureProvider())
+    # Pemanasan: import lazy Plotly/pandas tidak ikut terukur di ukuran pertama
+    bench_size(100, 1, 0)
+
+    results = {}
+    for n_bars in args.sizes:
+        stages = bench_size(n_bars, args.repeat, args.full_figure_max)
+        results[str(n_bars)] = stages
+        print(f"{n_bars:>12,} bar  " + "  ".join(f"{stage}={format_seconds(seconds)}" for stage, seconds in stages.items()))
+    
+    if args.json:
+        payload = {'python': platform.python_version(), 'pandas': pd.__version__, 'results': results}
+        Path(args.json).write_text(json.dumps(payload, indent=2))
+        print(f"Hasil -> {args.json}")
+    
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())['results']
+        regressions = find_regressions(results, baseline, args.tolerance)
+        for size, stage, reference, seconds in regressions:
+            print(f"REGRESI  {stage} @ {size} bar: {format_seconds(reference)} -> {format_seconds(seconds)}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"Tidak ada regresi di atas {args.tolerance:.0%} dibanding baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+# Pembuat figure Plotly untuk halaman scraper. Dipisah dari halaman Streamlit
+# agar bisa diukur (benchmarks/) dan dipakai ulang tanpa menjalankan UI.
+import numpy as np
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from indicators import INDICATORS
+from scraper_engine import downsample_buckets, downsample_line, downsample_ohlc
+
+INDICATOR_COLORS = {
+    'SMA': '#ffb74d',
+    'EMA': '#4fc3f7',
+    'BB Mid': '#b39ddb',
+    'BB Upper': '#7e57c2',
+    'BB Lower': '#7e57c2',
+    'VWAP': '#fff176',
+    'RSI': '#ba68c8',
+    'MACD': '#4fc3f7',
+    'MACD Signal': '#ffb74d',
+    'MACD Hist': '#90a4ae'
+}
+
+# Fungsi untuk membuat candlestick chart. indicators = {nama indikator: DataFrame}
+# dari indicators.compute_indicator; overlay (SMA/EMA/Bollinger/VWAP) digambar di
+# panel harga, RSI dan MACD di panel sendiri di bawah volume.
+def create_candlestick_chart(data, ticker, max_candles=None, indicators=None):
+    indicators = indicators or {}
+    if max_candles and len(data) > max_candles:
+        # Nilai indikator diambil di bar terakhir tiap kelompok candle (seperti Close)
+        starts, ends = downsample_buckets(len(data), max_candles)
+        indicators = {
+            name: frame.iloc[ends].set_axis(data.index[starts])
+            for name, frame in indicators.items()
+        }
+        data = downsample_ohlc(data, max_candles)
+    
+    panels = [name for name in ('RSI', 'MACD') if name in indicators]
+    fig = make_subplots(
+        rows=2 + len(panels), cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.03,
+        row_heights=[0.7, 0.3] if not panels else [0.5, 0.15] + [0.35 / len(panels)] * len(panels),
+        subplot_titles=(f'{ticker} Price Chart', 'Volume', *panels)
+    )
+    
+    # Candlestick
+    fig.add_trace(
+        go.Candlestick(
+            x=data.index,
+            open=data['Open'],
+            high=data['High'],
+            low=data['Low'],
+            close=data['Close'],
+            name='Price',
+            increasing_line_color='#26a69a',
+            decreasing_line_color='#ef5350'
+        ),
+        row=1, col=1
+    )
+    
+    # Volume bars
+    fig.add_trace(
+        go.Bar(
+            x=data.index,
+            y=data['Volume'],
+            name='Volume',
+            marker_color=volume_colors(data),
+            showlegend=False
+        ),
+        row=2, col=1
+    )
+    
+    # Indikator
+    for name, frame in indicators.items():
+        row = 1 if INDICATORS[name][2] else 3 + panels.index(name)
+        add_indicator_traces(fig, frame, row)
+    if 'RSI' in panels:
+        row = 3 + panels.index('RSI')
+        fig.add_hline(y=70, line_dash='dot', line_color='#ef5350', row=row, col=1)
+        fig.add_hline(y=30, line_dash='dot', line_color='#26a69a', row=row, col=1)
+    
+    # Update layout
+    fig.update_layout(
+        template='plotly_dark',
+        height=700 + 200 * len(panels),
+        xaxis_rangeslider_visible=False,
+        hovermode='x unified',
+        plot_bgcolor='#0e1117',
+        paper_bgcolor='#0e1117',
+        font=dict(color='#e0e0e0')
+    )
+    
+    fig.update_xaxes(showgrid=True, gridcolor='#1e2130')
+    fig.update_yaxes(showgrid=True, gridcolor='#1e2130')
+    
+    return fig
+
+# Fungsi untuk menambahkan kolom-kolom hasil indikator sebagai trace di satu baris
+def add_indicator_traces(fig, frame, row):
+    for column in frame.columns:
+        base = column.rsplit(' ', 1)[0] if column[-1].isdigit() else column
+        color = INDICATOR_COLORS.get(base, '#e0e0e0')
+        if column == 'MACD Hist':
+            fig.add_trace(
+                go.Bar(x=frame.index, y=frame[column], name=column, marker_color=color, showlegend=False),
+                row=row, col=1
+            )
+            continue
+        fig.add_trace(
+            go.Scattergl(
+                x=frame.index,
+                y=frame[column],
+                mode='lines',
+                name=column,
+                line=dict(color=color, width=1.2, dash='dot' if base in ('BB Upper', 'BB Lower') else None)
+            ),
+            row=row, col=1
+        )
+
+def volume_colors(data):
+    return np.where(data['Close'].to_numpy() >= data['Open'].to_numpy(), '#26a69a', '#ef5350')
+
+# Fungsi untuk mengganti data candlestick chart yang sudah ada tanpa membangun ulang
+# subplot, layout dan template (dipakai mode live). uirevision menjaga zoom/pan user.
+def update_candlestick_chart(fig, data):
+    with fig.batch_update():
+        fig.data[0].update(
+            x=data.index,
+            open=data['Open'],
+            high=data['High'],
+            low=data['Low'],
+            close=data['Close']
+        )
+        fig.data[1].update(x=data.index, y=data['Volume'], marker_color=volume_colors(data))
+    return fig
+
+# Fungsi untuk membuat chart garis harga penutupan (tab Overview)
+def create_price_line_chart(close, max_points=None):
+    if max_points:
+        close = downsample_line(close, max_points)
+    
+    fig = go.Figure()
+    fig.add_trace(go.Scattergl(
+        x=close.index,
+        y=close,
+        mode='lines',
+        name='Close Price',
+        line=dict(color='#667eea', width=2),
+        fill='tozeroy',
+        fillcolor='rgba(102, 126, 234, 0.1)'
+    ))
+    fig.update_layout(
+        template='plotly_dark',
+        height=600,
+        hovermode='x unified',
+        plot_bgcolor='#0e1117',
+        paper_bgcolor='#0e1117',
+        font=dict(color='#e0e0e0'),
+        showlegend=False,
+        xaxis=dict(showgrid=True, gridcolor='#1e2130'),
+        yaxis=dict(showgrid=True, gridcolor='#1e2130')
+    )
+    return fig
+
+# Fungsi untuk membuat histogram distribusi return
+def create_returns_histogram(returns):
+    fig = go.Figure()
+    fig.add_trace(go.Histogram(
+        x=returns.dropna(),
+        nbinsx=50,
+        name='Daily Returns',
+        marker_color='#667eea'
+    ))
+    fig.update_layout(
+        title='Distribution of Daily Returns',
+        template='plotly_dark',
+        height=400,
+        plot_bgcolor='#0e1117',
+        paper_bgcolor='#0e1117',
+        font=dict(color='#e0e0e0')
+    )
+    return fig
+
+# Fungsi untuk membuat chart metrik risiko rolling.
+# rolling_metrics = {(baris, nama, warna): series}
+def create_risk_chart(rolling_metrics, subplot_titles, max_points=None):
+    fig = make_subplots(
+        rows=len(subplot_titles), cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.05,
+        subplot_titles=subplot_titles
+    )
+    for (row, name, color), series in rolling_metrics.items():
+        series = series.dropna()
+        if max_points:
+            series = downsample_line(series, max_points)
+        fig.add_trace(
+            go.Scattergl(
+                x=series.index,
+                y=series,
+                mode='lines',
+                name=name,
+                line=dict(color=color, width=1.5),
+                fill='tozeroy' if name == 'Drawdown' else None
+            ),
+            row=row, col=1
+        )
+    fig.update_layout(
+        template='plotly_dark',
+        height=900,
+        hovermode='x unified',
+        plot_bgcolor='#0e1117',
+        paper_bgcolor='#0e1117',
+        font=dict(color='#e0e0e0')
+    )
+    fig.update_xaxes(showgrid=True, gridcolor='#1e2130')
+    fig.update_yaxes(showgrid=True, gridcolor='#1e2130')
+    return fig
+
+# Fungsi untuk membuat heatmap matriks korelasi return
+def create_correlation_heatmap(correlation):
+    size = len(correlation)
+    fig = go.Figure(go.Heatmap(
+        z=correlation.to_numpy(),
+        x=correlation.columns,
+        y=correlation.index,
+        zmin=-1,
+        zmax=1,
+        colorscale='RdBu_r',
+        colorbar=dict(title='Korelasi'),
+        hovertemplate='%{y} / %{x}: %{z:.2f}<extra></extra>'
+    ))
+    fig.update_layout(
+        template='plotly_dark',
+        height=min(1000, max(450, 18 * size)),
+        plot_bgcolor='#0e1117',
+        paper_bgcolor='#0e1117',
+        font=dict(color='#e0e0e0'),
+        yaxis=dict(autorange='reversed')
+    )
+    return fig
+
+# Fungsi untuk membuat chart korelasi rolling (satu garis per ticker)
+def create_rolling_correlation_chart(rolling, max_points=None):
+    fig = go.Figure()
+    for column in rolling.columns:
+        series = rolling[column].dropna()
+        if max_points:
+            series = downsample_line(series, max_points)
+        fig.add_trace(go.Scattergl(x=series.index, y=series, mode='lines', name=column, line=dict(width=1.5)))
+    fig.update_layout(
+        template='plotly_dark',
+        height=450,
+        hovermode='x unified',
+        plot_bgcolor='#0e1117',
+        paper_bgcolor='#0e1117',
+        font=dict(color='#e0e0e0'),
+        yaxis=dict(range=[-1, 1], showgrid=True, gridcolor='#1e2130'),
+        xaxis=dict(showgrid=True, gridcolor='#1e2130')
+    )
+    return fig
@@ -0,0 +1,311 @@
+# Sumber data histori harga dan info ticker. Mesin data (scraper_engine) hanya
+# memanggil provider aktif, sehingga jalur fetch -> statistik -> render bisa
+# dijalankan dan diukur tanpa jaringan. Provider dipilih lewat environment:
+#
+#   YF_PROVIDER=yfinance  (default) lewat library yfinance
+#   YF_PROVIDER=chart     langsung ke endpoint /v8/finance/chart di YF_CHART_URL
+#   YF_PROVIDER=fixture   rekaman lokal di YF_FIXTURE_DIR, atau data sintetis
+import yfinance as yf
+from yfinance.exceptions import YFPricesMissingError
+import pandas as pd
+import numpy as np
+import requests
+from pathlib import Path
+import json
+import os
+import re
+import threading
+import time
+import zlib
+
+INTRADAY_INTERVALS = ("1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h")
+
+# URL dasar API chart Yahoo untuk provider "chart" (mis. server stub lokal untuk pengujian)
+YF_CHART_URL = os.environ.get("YF_CHART_URL")
+
+# Folder rekaman untuk provider "fixture": <ticker>_<interval>.parquet/.csv
+# (format yang sama dengan file di YF_STORE_DIR) dan <ticker>_info.json
+YF_FIXTURE_DIR = os.environ.get("YF_FIXTURE_DIR")
+
+# Jika 0, ticker tanpa rekaman dianggap tidak punya data alih-alih dibuatkan data sintetis
+YF_FIXTURE_SYNTHETIC = os.environ.get("YF_FIXTURE_SYNTHETIC", "1") != "0"
+
+# Error HTTP dari endpoint chart (status dan deskripsi error dari Yahoo)
+class ChartHTTPError(Exception):
+    def __init__(self, status_code, description):
+        super().__init__(f"HTTP {status_code}: {description}")
+        self.status_code = status_code
+
+# Antarmuka provider. history() mengembalikan frame OHLCV + Dividends/Stock Splits
+# seperti Ticker.history(); frame kosong berarti "tidak ada data", bukan error.
+# rate_limited menentukan apakah request melewati rate limiter global;
+# store_namespace memisahkan folder penyimpanan lokal untuk data yang bukan dari Yahoo.
+class DataProvider:
+    name = None
+    rate_limited = True
+    store_namespace = None
+    
+    def history(self, ticker, interval, start=None, end=None, period=None):
+        raise NotImplementedError
+    
+    def info(self, ticker):
+        raise NotImplementedError
+
+class YFinanceProvider(DataProvider):
+    name = "yfinance"
+    
+    def history(self, ticker, interval, start=None, end=None, period=None):
+        kwargs = {'period': period} if start is None else {'start': start, 'end': end}
+        try:
+            return yf.Ticker(ticker).history(interval=interval, raise_errors=True, **kwargs)
+        except YFPricesMissingError:
+            return pd.DataFrame()
+    
+    def info(self, ticker):
+        return yf.Ticker(ticker).info
+
+# Fungsi untuk mengubah satu hasil endpoint chart Yahoo menjadi frame OHLCV
+# dengan format yang sama seperti Ticker.history() (harga adjusted)
+def parse_chart_result(result, interval):
+    timestamps = result.get('timestamp') or []
+    if not timestamps:
+        return pd.DataFrame()
+    tz = result.get('meta', {}).get('exchangeTimezoneName') or 'UTC'
+    intraday = interval in INTRADAY_INTERVALS
+    
+    def to_index(seconds):
+        index = pd.to_datetime(seconds, unit='s', utc=True).tz_convert(tz)
+        return index if intraday else index.normalize()
+    
+    quote = result['indicators']['quote'][0]
+    hist = pd.DataFrame({
+        'Open': quote.get('open'),
+        'High': quote.get('high'),
+        'Low': quote.get('low'),
+        'Close': quote.get('close'),
+        'Volume': quote.get('volume')
+    }, index=to_index(timestamps), dtype=float)
+    adjclose = result['indicators'].get('adjclose')
+    if adjclose:
+        ratio = np.asarray(adjclose[0]['adjclose'], dtype=float) / hist['Close'].to_numpy()
+        hist[['Open', 'High', 'Low']] = hist[['Open', 'High', 'Low']].mul(ratio, axis=0)
+        hist['Close'] = hist['Close'] * ratio
+    
+    hist['Dividends'] = 0.0
+    hist['Stock Splits'] = 0.0
+    events = result.get('events') or {}
+    for event in (events.get('dividends') or {}).values():
+        date = to_index([event['date']])[0]
+        if date in hist.index:
+            hist.loc[date, 'Dividends'] = event['amount']
+    for event in (events.get('splits') or {}).values():
+        date = to_index([event['date']])[0]
+        if date in hist.index:
+            hist.loc[date, 'Stock Splits'] = event['numerator'] / event['denominator']
+    
+    hist = hist.dropna(subset=['Close'])
+    hist['Volume'] = hist['Volume'].fillna(0).astype('int64')
+    hist.index.name = 'Datetime' if intraday else 'Date'
+    return hist[~hist.index.duplicated(keep='last')]
+
+# Fungsi untuk mengambil histori langsung dari endpoint chart Yahoo di base_url
+def fetch_chart_history(base_url, ticker, interval, start=None, end=None, period=None):
+    params = {'interval': interval, 'events': 'div,splits', 'includeAdjustedClose': 'true'}
+    if start is not None:
+        params['period1'] = int(pd.Timestamp(start).timestamp())
+        params['period2'] = int(pd.Timestamp(end).timestamp()) if end is not None else int(time.time())
+    else:
+        params['range'] = period or '1mo'
+    response = requests.get(f"{base_url.rstrip('/')}/v8/finance/chart/{ticker}", params=params, timeout=10)
+    try:
+        payload = response.json()
+    except ValueError:
+        payload = None
+    chart = (payload or {}).get('chart') or {}
+    if response.status_code >= 400 or chart.get('error'):
+        description = (chart.get('error') or {}).get('description') or response.reason
+        raise ChartHTTPError(response.status_code, description)
+    if not chart.get('result'):
+        return pd.DataFrame()
+    return parse_chart_result(chart['result'][0], interval)
+
+# Histori dari endpoint chart; info perusahaan tetap lewat yfinance
+class ChartHTTPProvider(YFinanceProvider):
+    name = "chart"
+    
+    def __init__(self, base_url):
+        self.base_url = base_url
+    
+    def history(self, ticker, interval, start=None, end=None, period=None):
+        return fetch_chart_history(self.base_url, ticker, interval, start=start, end=end, period=period)
+
+# Frekuensi bar sintetis per interval
+FIXTURE_FREQ = {
+    "1m": "1min", "2m": "2min", "5m": "5min", "15m": "15min", "30m": "30min",
+    "60m": "1h", "90m": "90min", "1h": "1h",
+    "1d": "B", "5d": "5B", "1wk": "W-MON", "1mo": "MS", "3mo": "QS"
+}
+
+# Data sintetis dimulai dari tanggal ini untuk period="max"
+FIXTURE_EPOCH = pd.Timestamp("2000-01-03", tz="UTC")
+
+_PERIOD_PATTERN = re.compile(r'^(\d+)(d|wk|mo|y)$')
+_PERIOD_UNITS = {'d': 'days', 'wk': 'weeks', 'mo': 'months', 'y': 'years'}
+
+def _period_start(period, anchor):
+    if period in (None, "max"):
+        return FIXTURE_EPOCH
+    if period == "ytd":
+        return anchor.normalize().replace(month=1, day=1)
+    match = _PERIOD_PATTERN.match(period)
+    if not match:
+        raise ValueError(f"Periode tidak valid: {period}")
+    return anchor - pd.DateOffset(**{_PERIOD_UNITS[match.group(2)]: int(match.group(1))})
+
+def _to_utc(value):
+    value = pd.Timestamp(value)
+    return value.tz_localize("UTC") if value.tzinfo is None else value.tz_convert("UTC")
+
+# Bilangan acak deterministik (0, 1) dari timestamp (hash splitmix64), sehingga nilai
+# satu bar selalu sama berapa pun rentang yang diminta
+def _hash_uniform(keys, seed):
+    with np.errstate(over='ignore'):
+        z = keys.astype(np.uint64) + np.uint64(seed) * np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        z = z ^ (z >> np.uint64(31))
+    return ((z >> np.uint64(11)).astype(np.float64) + 0.5) / 2.0 ** 53
+
+# Fungsi untuk membuat histori OHLCV sintetis pada timestamp yang diberikan.
+# Harga = gabungan beberapa gelombang (tahunan, bulanan, mingguan) + noise per bar.
+def synthetic_ohlcv(ticker, index):
+    seed = zlib.crc32(ticker.encode())
+    keys = index.asi8
+    days = keys / 86_400e9
+    phase = seed % 360 / 57.3
+    base = np.log(20 + seed % 500)
+    
+    def log_price(salt):
+        noise = _hash_uniform(keys, seed + salt) - 0.5
+        return base + 0.3 * np.sin(days / 58.1 + phase) + 0.08 * np.sin(days / 5.3 + phase) + 0.01 * noise
+    
+    open_price = np.exp(log_price(1))
+    close_price = np.exp(log_price(2))
+    body_high = np.maximum(open_price, close_price)
+    body_low = np.minimum(open_price, close_price)
+    return pd.DataFrame({
+        'Open': open_price,
+        'High': body_high * (1 + 0.005 * _hash_uniform(keys, seed + 3)),
+        'Low': body_low * (1 - 0.005 * _hash_uniform(keys, seed + 4)),
+        'Close': close_price,
+        'Volume': (1_000_000 * (0.2 + _hash_uniform(keys, seed + 5))).astype('int64'),
+        'Dividends': 0.0,
+        'Stock Splits': 0.0
+    }, index=index)
+
+# Provider offline: memutar ulang rekaman dari fixture_dir, atau membuat data sintetis
+# deterministik untuk ticker yang tidak direkam. Bar intraday sintetis hanya
+# muncul pada jam bursa AS (14:30-21:00 UTC, Senin-Jumat).
+class FixtureProvider(DataProvider):
+    name = "fixture"
+    rate_limited = False
+    store_namespace = "fixture"
+    
+    def __init__(self, fixture_dir=None, synthetic=True):
+        self.fixture_dir = Path(fixture_dir) if fixture_dir else None
+        self.synthetic = synthetic
+        self._recorded = {}
+        self._lock = threading.Lock()
+    
+    def _fixture_path(self, ticker, suffix):
+        return self.fixture_dir / f"{re.sub(r'[^A-Za-z0-9._-]', '_', ticker)}{suffix}"
+    
+    def load_recording(self, ticker, interval):
+        if self.fixture_dir is None:
+            return None
+        key = (ticker, interval)
+        with self._lock:
+            if key not in self._recorded:
+                hist = None
+                parquet_path = self._fixture_path(ticker, f"_{interval}.parquet")
+                csv_path = self._fixture_path(ticker, f"_{interval}.csv")
+                if parquet_path.exists():
+                    hist = pd.read_parquet(parquet_path)
+                elif csv_path.exists():
+                    hist = pd.read_csv(csv_path, index_col=0)
+                    hist.index = pd.to_datetime(hist.index, utc=True)
+                self._recorded[key] = hist
+            return self._recorded[key]
+    
+    def synthetic_history(self, ticker, interval, start, end):
+        # Awal rentang dibulatkan ke grid bar agar permintaan dengan rentang yang
+        # bertumpuk selalu menghasilkan timestamp yang sama
+        start = start.ceil(FIXTURE_FREQ[interval] if interval in INTRADAY_INTERVALS else 'D')
+        index = pd.date_range(start, end, freq=FIXTURE_FREQ[interval], inclusive='left')
+        if interval in INTRADAY_INTERVALS:
+            index = index[index.dayofweek < 5]
+            minutes = index.hour * 60 + index.minute
+            index = index[(minutes >= 14 * 60 + 30) & (minutes < 21 * 60)]
+            index.name = 'Datetime'
+        else:
+            index = index.normalize()
+            index.name = 'Date'
+        return synthetic_ohlcv(ticker, index)
+    
+    def history(self, ticker, interval, start=None, end=None, period=None):
+        recorded = self.load_recording(ticker, interval)
+        if recorded is None and not self.synthetic:
+            return pd.DataFrame()
+        if recorded is not None:
+            # Periode rekaman dihitung mundur dari bar terakhir yang direkam
+            anchor = recorded.index[-1] if len(recorded) else pd.Timestamp.now(tz="UTC")
+        else:
+            anchor = pd.Timestamp.now(tz="UTC")
+        start = _to_utc(start) if start is not None else _period_start(period, _to_utc(anchor))
+        end = _to_utc(end) if end is not None else _to_utc(anchor) + pd.Timedelta(1, 'ns')
+        if recorded is None:
+            return self.synthetic_history(ticker, interval, start, end)
+        index = recorded.index
+        utc_index = index.tz_convert("UTC") if index.tz is not None else index.tz_localize("UTC")
+        return recorded[(utc_index >= start) & (utc_index < end)]
+    
+    def info(self, ticker):
+        if self.fixture_dir is not None:
+            path = self._fixture_path(ticker, "_info.json")
+            if path.exists():
+                return json.loads(path.read_text())
+        return {
+            'symbol': ticker,
+            'longName': f"{ticker} (fixture)",
+            'currency': 'USD',
+            'quoteType': 'EQUITY'
+        }
+
+# Fungsi untuk membuat provider berdasarkan nama (default dari YF_PROVIDER)
+def create_provider(name=None):
+    name = (name or os.environ.get("YF_PROVIDER") or ("chart" if YF_CHART_URL else "yfinance")).lower()
+    if name == "yfinance":
+        return YFinanceProvider()
+    if name == "chart":
+        if not YF_CHART_URL:
+            raise ValueError("Provider 'chart' membutuhkan YF_CHART_URL")
+        return ChartHTTPProvider(YF_CHART_URL)
+    if name == "fixture":
+        return FixtureProvider(YF_FIXTURE_DIR, synthetic=YF_FIXTURE_SYNTHETIC)
+    raise ValueError(f"Provider tidak dikenal: {name}")
+
+_PROVIDER = None
+_PROVIDER_LOCK = threading.Lock()
+
+def get_data_provider():
+    global _PROVIDER
+    with _PROVIDER_LOCK:
+        if _PROVIDER is None:
+            _PROVIDER = create_provider()
+        return _PROVIDER
+
+# Mengganti provider aktif (mis. FixtureProvider di benchmark/pengujian)
+def set_data_provider(provider):
+    global _PROVIDER
+    with _PROVIDER_LOCK:
+        _PROVIDER = provider
@@ -0,0 +1,31 @@
+# Cache figure Plotly yang dipakai bersama oleh halaman scraper dan forecaster.
+# Figure yang sudah dibangun disimpan dengan kunci sidik jari isi data + opsi chart.
+# Rerun yang datanya tidak berubah (mis. hanya widget lain yang diubah) tidak
+# membangun ulang figure; st.plotly_chart menerima objek Figure yang sudah tervalidasi
+# sehingga validasi ulang dari dict juga dilewati.
+import os
+
+import plotly.io
+
+from fingerprint import data_fingerprint
+from scraper_engine import BoundedCache
+
+FIGURE_CACHE_MAX_MB = float(os.environ.get("YF_FIGURE_CACHE_MAX_MB", 256))
+
+FIGURE_CACHE = BoundedCache(int(FIGURE_CACHE_MAX_MB * 1024 * 1024))
+
+def get_figure_cache():
+    return FIGURE_CACHE
+
+# Fungsi untuk mendapatkan figure dari cache, atau membangunnya dengan build() bila
+# belum ada. Mengembalikan (figure, True jika dari cache). Figure hasil cache dipakai
+# bersama antar sesi, jadi jangan diubah in-place.
+def cached_figure(name, key_parts, build):
+    key = (name, data_fingerprint(*key_parts))
+    fig = FIGURE_CACHE.get(key)
+    if fig is not None:
+        return fig, True
+    fig = build()
+    # Ukuran entri dihitung dari JSON figure (payload yang dikirim st.plotly_chart)
+    FIGURE_CACHE.put(key, fig, size=len(plotly.io.to_json(fig, validate=False)))
+    return fig, False
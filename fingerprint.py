@@ -0,0 +1,87 @@
+# Sidik jari isi data (DataFrame/Series/Index/array, bisa bersarang di tuple/list/
+# dict) beserta opsi skalar. Dipakai sebagai kunci cache figure, tahap pipeline
+# forecaster, dan registry model; modul ini sengaja tidak bergantung pada Streamlit.
+import hashlib
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+# Sidik jari objek read-only (frame bersama dari cache histori) diingat per objek,
+# sehingga rerun berikutnya tidak perlu membaca ulang seluruh isinya
+_DIGESTS = {}
+_DIGESTS_LOCK = threading.Lock()
+
+def _array_digest(digest, values):
+    values = np.asarray(values)
+    digest.update(f'{values.dtype.str}{values.shape}'.encode())
+    if values.dtype.kind == 'O':
+        digest.update(pd.util.hash_pandas_object(pd.Series(values.ravel()), index=False).to_numpy().data)
+    else:
+        digest.update(np.ascontiguousarray(values).data)
+
+def _index_digest(digest, index):
+    digest.update(f'{type(index).__name__}{getattr(index, "tz", None)}{list(index.names)}'.encode())
+    _array_digest(digest, index.asi8 if isinstance(index, pd.DatetimeIndex) else index.to_numpy())
+
+def _content_digest(value):
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(value, pd.DataFrame):
+        digest.update(repr(list(value.columns)).encode())
+        _index_digest(digest, value.index)
+        for position in range(value.shape[1]):
+            _array_digest(digest, value.iloc[:, position].to_numpy())
+    elif isinstance(value, pd.Series):
+        digest.update(repr(value.name).encode())
+        _index_digest(digest, value.index)
+        _array_digest(digest, value.to_numpy())
+    elif isinstance(value, pd.Index):
+        _index_digest(digest, value)
+    else:
+        _array_digest(digest, value)
+    return digest.digest()
+
+def _is_read_only(value):
+    if isinstance(value, pd.DataFrame):
+        return all(not value.iloc[:, position].to_numpy().flags.writeable for position in range(value.shape[1]))
+    if isinstance(value, pd.Series):
+        return not value.to_numpy().flags.writeable
+    return isinstance(value, pd.Index) or not value.flags.writeable
+
+def _object_digest(value):
+    key = id(value)
+    with _DIGESTS_LOCK:
+        entry = _DIGESTS.get(key)
+    if entry is not None and entry[0]() is value:
+        return entry[1]
+    digest = _content_digest(value)
+    if _is_read_only(value):
+        ref = weakref.ref(value, lambda _, key=key: _DIGESTS.pop(key, None))
+        with _DIGESTS_LOCK:
+            _DIGESTS[key] = (ref, digest)
+    return digest
+
+def _update_digest(digest, value):
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index, np.ndarray)):
+        digest.update(b'D' + _object_digest(value))
+    elif isinstance(value, (tuple, list)):
+        digest.update(b'(')
+        for item in value:
+            _update_digest(digest, item)
+        digest.update(b')')
+    elif isinstance(value, dict):
+        digest.update(b'{')
+        for item_key, item in value.items():
+            _update_digest(digest, item_key)
+            _update_digest(digest, item)
+        digest.update(b'}')
+    else:
+        digest.update(f'{type(value).__name__}:{value!r};'.encode())
+
+# Fungsi untuk menghitung sidik jari isi data (DataFrame/Series/array, bisa
+# bersarang di tuple/list/dict) beserta opsi skalar
+def data_fingerprint(*parts):
+    digest = hashlib.blake2b(digest_size=16)
+    _update_digest(digest, parts)
+    return digest.hexdigest()
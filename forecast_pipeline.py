@@ -0,0 +1,197 @@
+# Tahap-tahap pipeline forecaster (ingest -> parse -> clean -> split -> search ->
+# fit -> forecast -> diagnostics) sebagai fungsi terpisah yang hasilnya diingat per sesi.
+# Kunci tiap tahap dibentuk dari kunci tahap sebelumnya + parameter tahap itu
+# sendiri, sehingga perubahan satu pengaturan hanya menjalankan ulang tahap yang
+# bergantung padanya. Contoh: mengubah jumlah periode forecast hanya menjalankan
+# tahap forecast, tanpa parsing tanggal, pencarian order, maupun fitting ulang.
+import hashlib
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from pmdarima import auto_arima
+from sklearn.metrics import mean_absolute_error, mean_squared_error
+
+from arima_search import parallel_auto_arima
+from fingerprint import data_fingerprint
+from model_registry import find_appended_model, load_model, save_model, update_appended_model
+from scraper_engine import BoundedCache
+import instrumentation
+
+PARALLEL_SEARCH = "Paralel dengan batas waktu"
+
+UPLOAD_TYPES = ['csv', 'parquet', 'xlsx', 'xls']
+
+# File upload yang sudah di-parse dipakai bersama antar rerun dan antar sesi,
+# dengan kunci sidik jari isi file (bukan nama file)
+UPLOAD_CACHE_MAX_MB = float(os.environ.get("FORECAST_UPLOAD_CACHE_MAX_MB", 256))
+
+UPLOAD_CACHE = BoundedCache(int(UPLOAD_CACHE_MAX_MB * 1024 * 1024))
+
+def get_upload_cache():
+    return UPLOAD_CACHE
+
+# Fungsi untuk menghitung sidik jari isi file upload
+def upload_digest(content):
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+# Fungsi untuk membaca isi file sesuai ekstensinya. CSV dibaca dengan parser
+# multi-thread pyarrow (kembali ke parser bawaan pandas jika formatnya tidak didukung).
+def read_upload(name, content):
+    suffix = name.rsplit('.', 1)[-1].lower()
+    buffer = io.BytesIO(content)
+    if suffix == 'csv':
+        try:
+            return pd.read_csv(buffer, engine='pyarrow')
+        except Exception:
+            buffer.seek(0)
+            return pd.read_csv(buffer)
+    if suffix == 'parquet':
+        return pq.read_table(buffer).to_pandas()
+    return pd.read_excel(buffer)
+
+# Tahap ingest: file upload (objek dengan name dan getvalue()) hanya di-parse sekali
+# per isi file; workbook Excel yang lambat dibaca pun cukup dikonversi sekali. Frame
+# hasil cache dipakai bersama, jadi jangan diubah in-place.
+def load_upload(uploaded_file, digest):
+    key = (digest, uploaded_file.name.rsplit('.', 1)[-1].lower())
+    df = UPLOAD_CACHE.get(key)
+    instrumentation.event('forecast.ingest', cache='hit' if df is not None else 'miss')
+    if df is None:
+        with instrumentation.stage('forecast.ingest.read', file=uploaded_file.name) as record:
+            df = read_upload(uploaded_file.name, uploaded_file.getvalue())
+            record['rows'] = len(df)
+        UPLOAD_CACHE.put(key, df)
+    return df
+
+# Fungsi untuk membuat kunci satu tahap dari kunci tahap hulu dan parameternya
+def stage_key(name, *parts):
+    return data_fingerprint(name, *parts)
+
+# Fungsi untuk mengambil hasil tahap yang tersimpan jika kuncinya masih sama
+def cached_stage(stages, name, key):
+    cached = stages.get(name)
+    return cached[1] if cached is not None and cached[0] == key else None
+
+# Fungsi untuk menjalankan satu tahap secara memo; stages = dict per sesi berisi
+# {nama tahap: (kunci, hasil)}. Hanya hasil terakhir tiap tahap yang disimpan.
+def run_stage(stages, name, key, compute):
+    cached = stages.get(name)
+    if cached is not None and cached[0] == key:
+        instrumentation.event(f'forecast.{name}', cache='hit')
+        return cached[1]
+    with instrumentation.stage(f'forecast.{name}', cache='miss'):
+        result = compute()
+    stages[name] = (key, result)
+    return result
+
+# Tahap parse: kolom tanggal diubah ke datetime, diurutkan, lalu dijadikan index
+def parse_dates(df, date_column):
+    df_copy = df.copy()
+    df_copy[date_column] = pd.to_datetime(df_copy[date_column])
+    df_copy = df_copy.sort_values(date_column)
+    df_copy.set_index(date_column, inplace=True)
+    return df_copy
+
+# Tahap clean: ambil kolom nilai tanpa missing value
+def clean_series(parsed, value_column):
+    return parsed[value_column].dropna()
+
+# Tahap split: data training dan test
+def split_series(data, train_ratio):
+    train_size = int(len(data) * (train_ratio / 100))
+    return data[:train_size], data[train_size:]
+
+# Tahap search: model dari registry (persis atau diperbarui dengan baris baru), atau
+# hasil pencarian order. Mengembalikan (model, keterangan sumber, ringkasan pencarian).
+def search_model(data, train_data, spec, use_stored_model=True, update_stored_model=True,
+                 time_budget=None, on_status=None, on_progress=None):
+    model_auto = None
+    model_loaded = False
+    model_source = None
+    search_summary = None
+    if use_stored_model:
+        model_auto = load_model(data, spec)
+        model_loaded = model_auto is not None
+        if model_loaded:
+            model_source = "📦 Model tersimpan dipakai (tanpa pencarian order dan fitting)"
+        elif update_stored_model:
+            stored_model, stored_rows = find_appended_model(data, spec)
+            if stored_model is not None:
+                if on_status is not None:
+                    on_status(f"🔄 Memperbarui model tersimpan dengan {len(data) - stored_rows} baris baru...")
+                model_auto = update_appended_model(stored_model, train_data)
+                model_source = f"🔄 Model tersimpan diperbarui dengan {len(data) - stored_rows} baris baru (order {model_auto.order} dipakai ulang)"
+    
+    if model_auto is None:
+        if spec['search'] == PARALLEL_SEARCH:
+            model_auto, search_summary = parallel_auto_arima(
+                train_data,
+                seasonal=spec['seasonal'],
+                m=spec['m'],
+                time_budget=time_budget,
+                on_progress=on_progress
+            )
+        else:
+            model_auto = auto_arima(
+                train_data,
+                seasonal=spec['seasonal'],
+                m=spec['m'],
+                suppress_warnings=True,
+                stepwise=True,
+                trace=False
+            )
+    
+    if use_stored_model and not model_loaded:
+        save_model(data, spec, model_auto)
+    return model_auto, model_source, search_summary
+
+# Tahap fit: model training = hasil fit pencarian order (tanpa fit ulang), diperluas
+# ke semua data lewat update state-space dengan parameter hasil training (append
+# tanpa refit). Prediksi test dan metrik evaluasi dihitung di tahap ini juga.
+def fit_models(model_auto, test_data):
+    model_fit = model_auto.arima_res_
+    result = {'model_fit': model_fit, 'predictions_test': None, 'metrics': None}
+    if len(test_data) > 0:
+        # Index hasil statsmodels bisa berupa RangeIndex (tanggal tidak beraturan),
+        # jadi nilainya dipasang ke tanggal test tanpa penyelarasan label
+        predictions_test = pd.Series(
+            np.asarray(model_fit.get_forecast(steps=len(test_data)).predicted_mean),
+            index=test_data.index
+        )
+        result['predictions_test'] = predictions_test
+        result['metrics'] = {
+            'MAE': mean_absolute_error(test_data, predictions_test),
+            'RMSE': np.sqrt(mean_squared_error(test_data, predictions_test)),
+            'MAPE': np.mean(np.abs((test_data - predictions_test) / test_data)) * 100
+        }
+    result['model_full_fit'] = model_fit.append(test_data.to_numpy(), refit=False) if len(test_data) > 0 else model_fit
+    return result
+
+# Tahap forecast: tanggal masa depan, prediksi titik, dan confidence interval dari
+# satu get_forecast
+def future_forecast(model_full_fit, index, forecast_periods, value_column):
+    freq = pd.infer_freq(index)
+    if freq is None:
+        freq = 'D'  # Default ke harian
+    
+    future_dates = pd.date_range(
+        start=index[-1],
+        periods=forecast_periods + 1,
+        freq=freq
+    )[1:]
+    
+    forecast_result = model_full_fit.get_forecast(steps=forecast_periods)
+    forecast = pd.Series(np.asarray(forecast_result.predicted_mean), index=future_dates)
+    forecast_ci = pd.DataFrame(
+        np.asarray(forecast_result.conf_int()),
+        index=future_dates,
+        columns=[f'lower {value_column}', f'upper {value_column}']
+    )
+    return future_dates, forecast, forecast_ci
+
+# Tahap diagnostics: residual dan ringkasan model
+def model_diagnostics(model_full_fit):
+    return model_full_fit.resid, str(model_full_fit.summary())
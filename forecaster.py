@@ -1,15 +1,18 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
-from pmdarima import auto_arima
-from statsmodels.tsa.arima.model import ARIMA
-from sklearn.metrics import mean_absolute_error, mean_squared_error
 import warnings
 warnings.filterwarnings('ignore')
 
+from arima_search import ARIMA_SEARCH_WORKERS
+from figure_cache import cached_figure
+from forecast_pipeline import (
+    PARALLEL_SEARCH, UPLOAD_TYPES, cached_stage, clean_series, fit_models, future_forecast, load_upload,
+    model_diagnostics, parse_dates, run_stage, search_model, split_series, stage_key, upload_digest
+)
+
 # Konfigurasi halaman
 st.set_page_config(
     page_title="Peramalan Runtun Waktu (Time Series)",
@@ -64,8 +67,8 @@ with st.sidebar:
     # Upload file
     st.subheader("1️⃣ Upload Data")
     uploaded_file = st.file_uploader(
-        "Upload file CSV atau Excel",
-        type=['xlsx', 'xls'],
+        "Upload file CSV, Parquet atau Excel",
+        type=UPLOAD_TYPES,
         help="File harus berisi kolom tanggal dan kolom nilai numerik"
     )
     
@@ -75,11 +78,14 @@ with st.sidebar:
 # Main content
 if uploaded_file is not None:
     try:
-        # Baca file
-        if uploaded_file.name.endswith('.csv'):
-            df = pd.read_csv(uploaded_file)
-        else:
-            df = pd.read_excel(uploaded_file)
+        # Baca file: hasil parse di-cache per sidik jari isi file, sehingga rerun
+        # (mis. menggeser slider) tidak membaca ulang file. Sidik jari diingat per
+        # upload agar isi file juga tidak di-hash ulang setiap rerun.
+        upload_key = st.session_state.get('upload_digest')
+        if upload_key is None or upload_key[0] != uploaded_file.file_id:
+            upload_key = (uploaded_file.file_id, upload_digest(uploaded_file.getvalue()))
+            st.session_state['upload_digest'] = upload_key
+        df = load_upload(uploaded_file, upload_key[1])
         
         # Preview data
         with st.expander("👀 Preview Data", expanded=True):
@@ -148,111 +154,130 @@ if uploaded_file is not None:
                     help="Jumlah periode dalam satu siklus musiman"
                 )
             
+            # Metode pencarian order
+            search_mode = st.radio(
+                "Metode Pencarian Order",
+                options=["Stepwise (auto_arima)", PARALLEL_SEARCH],
+                help="Mode paralel mengevaluasi kandidat order di beberapa core sekaligus dan berhenti saat batas waktu habis"
+            )
+            
+            if search_mode == PARALLEL_SEARCH:
+                time_budget = st.slider(
+                    "Batas Waktu Pencarian (detik)",
+                    min_value=5,
+                    max_value=600,
+                    value=60,
+                    step=5,
+                    help=f"Model terbaik yang ditemukan sampai batas waktu ini yang dipakai ({ARIMA_SEARCH_WORKERS} proses pekerja)"
+                )
+            
+            # Registry model di disk
+            use_stored_model = st.checkbox(
+                "Gunakan model tersimpan",
+                value=True,
+                help="Data dan pengaturan yang sama memakai model yang sudah pernah di-fit tanpa pencarian order ulang"
+            )
+            
+            update_stored_model = st.checkbox(
+                "Perbarui model tersimpan bila hanya ada baris baru",
+                value=True,
+                disabled=not use_stored_model,
+                help="Order model lama dipakai ulang dan parameternya di-fit ulang mulai dari nilai lama"
+            )
+            
             st.markdown("---")
             run_forecast = st.button("🚀 Jalankan Forecasting", type="primary", use_container_width=True)
         
-        # Proses forecasting
-        if run_forecast:
+        # Proses forecasting sebagai rangkaian tahap yang hasilnya diingat per sesi:
+        # tiap tahap hanya dijalankan ulang jika kunci (input) tahap itu berubah
+        stages = st.session_state.setdefault('forecast_stages', {})
+        
+        # Spesifikasi model: semua pengaturan yang menentukan hasil fit
+        model_spec = {
+            'train_ratio': train_ratio,
+            'seasonal': seasonal,
+            'm': int(m_value) if seasonal else 1,
+            'search': search_mode
+        }
+        if search_mode == PARALLEL_SEARCH:
+            model_spec['time_budget'] = time_budget
+        
+        parse_key = stage_key('parse', upload_key[1], date_column)
+        clean_key = stage_key('clean', parse_key, value_column)
+        split_key = stage_key('split', clean_key, train_ratio)
+        search_key = stage_key('search', split_key, model_spec, use_stored_model, update_stored_model)
+        fit_key = stage_key('fit', search_key)
+        forecast_key = stage_key('forecast', fit_key, forecast_periods)
+        diagnostics_key = stage_key('diagnostics', fit_key)
+        
+        # Pencarian order (mahal) hanya dijalankan lewat tombol; selama modelnya masih
+        # ada di sesi, perubahan pengaturan lain (mis. periode forecast) langsung diterapkan
+        search_cached = cached_stage(stages, 'search', search_key) is not None
+        if run_forecast or search_cached:
             with st.spinner("🔄 Memproses data dan melakukan forecasting..."):
                 try:
                     # Persiapan data
-                    df_copy = df.copy()
-                    df_copy[date_column] = pd.to_datetime(df_copy[date_column])
-                    df_copy = df_copy.sort_values(date_column)
-                    df_copy.set_index(date_column, inplace=True)
-                    
-                    # Ambil data nilai
-                    data = df_copy[value_column].dropna()
-                    
-                    # Split data
-                    train_size = int(len(data) * (train_ratio / 100))
-                    train_data = data[:train_size]
-                    test_data = data[train_size:]
-                    
-                    # Progress bar
-                    progress_bar = st.progress(0)
-                    status_text = st.empty()
-                    
-                    # Auto ARIMA
-                    status_text.text("🔍 Mencari parameter ARIMA terbaik...")
-                    progress_bar.progress(25)
-                    
-                    if seasonal:
-                        model_auto = auto_arima(
-                            train_data,
-                            seasonal=True,
-                            m=m_value,
-                            suppress_warnings=True,
-                            stepwise=True,
-                            trace=False
-                        )
-                    else:
-                        model_auto = auto_arima(
-                            train_data,
-                            seasonal=False,
-                            suppress_warnings=True,
-                            stepwise=True,
-                            trace=False
+                    parsed = run_stage(stages, 'parse', parse_key, lambda: parse_dates(df, date_column))
+                    data = run_stage(stages, 'clean', clean_key, lambda: clean_series(parsed, value_column))
+                    train_data, test_data = run_stage(stages, 'split', split_key, lambda: split_series(data, train_ratio))
+                    
+                    # Progress bar hanya saat model benar-benar dicari dan di-fit
+                    progress_bar = status_text = None
+                    if not search_cached:
+                        progress_bar = st.progress(0)
+                        status_text = st.empty()
+                        status_text.text("🔍 Mencari parameter ARIMA terbaik...")
+                        progress_bar.progress(25)
+                    
+                    # Progress 25-50% mengikuti jumlah kandidat yang sudah dievaluasi
+                    def show_search_progress(done, total, best):
+                        progress_bar.progress(25 + int(25 * done / total))
+                        best_text = f", AIC terbaik: {best.aic():.2f} {best.order}" if best is not None else ""
+                        status_text.text(f"🔍 Mencari parameter ARIMA terbaik... ({done}/{total} kandidat{best_text})")
+                    
+                    model_auto, model_source, search_summary = run_stage(
+                        stages, 'search', search_key,
+                        lambda: search_model(
+                            data, train_data, model_spec,
+                            use_stored_model=use_stored_model,
+                            update_stored_model=update_stored_model,
+                            time_budget=time_budget if search_mode == PARALLEL_SEARCH else None,
+                            on_status=status_text.text,
+                            on_progress=show_search_progress
                         )
-                    
-                    progress_bar.progress(50)
-                    
-                    # Fitting model
-                    status_text.text("🎯 Melatih model ARIMA...")
+                    )
                     order = model_auto.order
+                    seasonal_order = model_auto.seasonal_order
                     
-                    if seasonal:
-                        seasonal_order = model_auto.seasonal_order
-                        model = ARIMA(train_data, order=order, seasonal_order=seasonal_order)
-                    else:
-                        model = ARIMA(train_data, order=order)
+                    if progress_bar is not None:
+                        progress_bar.progress(50)
+                        status_text.text("🎯 Melatih model ARIMA...")
                     
-                    model_fit = model.fit()
+                    fitted = run_stage(stages, 'fit', fit_key, lambda: fit_models(model_auto, test_data))
+                    model_full_fit = fitted['model_full_fit']
+                    predictions_test = fitted['predictions_test']
                     
-                    progress_bar.progress(75)
+                    if progress_bar is not None:
+                        progress_bar.progress(75)
+                        status_text.text("📊 Membuat prediksi...")
                     
-                    # Prediksi
-                    status_text.text("📊 Membuat prediksi...")
+                    future_dates, forecast_future, forecast_ci = run_stage(
+                        stages, 'forecast', forecast_key,
+                        lambda: future_forecast(model_full_fit, data.index, forecast_periods, value_column)
+                    )
+                    residuals, model_summary = run_stage(
+                        stages, 'diagnostics', diagnostics_key, lambda: model_diagnostics(model_full_fit)
+                    )
                     
-                    # Prediksi untuk data test
-                    if len(test_data) > 0:
-                        predictions_test = model_fit.forecast(steps=len(test_data))
+                    if progress_bar is not None:
+                        progress_bar.progress(100)
+                        status_text.text("✅ Selesai!")
                         
-                        # Metrik evaluasi
-                        mae = mean_absolute_error(test_data, predictions_test)
-                        rmse = np.sqrt(mean_squared_error(test_data, predictions_test))
-                        mape = np.mean(np.abs((test_data - predictions_test) / test_data)) * 100
-                    
-                    # Prediksi untuk future
-                    # Refit dengan semua data
-                    if seasonal:
-                        model_full = ARIMA(data, order=order, seasonal_order=seasonal_order)
-                    else:
-                        model_full = ARIMA(data, order=order)
-                    
-                    model_full_fit = model_full.fit()
-                    forecast_future = model_full_fit.forecast(steps=forecast_periods)
-                    
-                    # Buat tanggal untuk forecast
-                    last_date = data.index[-1]
-                    freq = pd.infer_freq(data.index)
-                    if freq is None:
-                        freq = 'D'  # Default ke harian
-                    
-                    future_dates = pd.date_range(
-                        start=last_date,
-                        periods=forecast_periods + 1,
-                        freq=freq
-                    )[1:]
-                    
-                    progress_bar.progress(100)
-                    status_text.text("✅ Selesai!")
-                    
-                    # Hapus progress bar
-                    import time
-                    time.sleep(0.5)
-                    progress_bar.empty()
-                    status_text.empty()
+                        # Hapus progress bar
+                        import time
+                        time.sleep(0.5)
+                        progress_bar.empty()
+                        status_text.empty()
                     
                     # Tampilkan hasil
                     st.markdown("---")
@@ -294,102 +319,111 @@ if uploaded_file is not None:
                         </div>
                         """, unsafe_allow_html=True)
                     
+                    if model_source is not None:
+                        st.caption(model_source)
+                    
+                    if search_summary is not None:
+                        st.caption(
+                            f"Pencarian order: {search_summary['evaluated']} dari {search_summary['candidates']} kandidat "
+                            f"dievaluasi dalam {search_summary['seconds']:.1f} detik oleh {search_summary['workers']} proses"
+                            + (" (batas waktu habis)" if search_summary['expired'] else "")
+                        )
+                    
                     # Metrik evaluasi (jika ada test data)
                     if len(test_data) > 0:
+                        metrics = fitted['metrics']
                         st.subheader("📈 Metrik Evaluasi (Test Set)")
                         col1, col2, col3 = st.columns(3)
                         
                         with col1:
-                            st.metric("MAE", f"{mae:.2f}")
+                            st.metric("MAE", f"{metrics['MAE']:.2f}")
                         with col2:
-                            st.metric("RMSE", f"{rmse:.2f}")
+                            st.metric("RMSE", f"{metrics['RMSE']:.2f}")
                         with col3:
-                            st.metric("MAPE", f"{mape:.2f}%")
+                            st.metric("MAPE", f"{metrics['MAPE']:.2f}%")
                     
                     # Visualisasi
                     st.subheader("📉 Visualisasi Forecasting")
                     
-                    # Create plotly figure
-                    fig = go.Figure()
-                    
-                    # Data historis
-                    fig.add_trace(go.Scatter(
-                        x=train_data.index,
-                        y=train_data.values,
-                        mode='lines',
-                        name='Data Training',
-                        line=dict(color='#1f77b4', width=2)
-                    ))
-                    
-                    # Data test
-                    if len(test_data) > 0:
+                    # Figure dibangun ulang hanya jika salah satu tahap hulunya berubah
+                    def build_forecast_figure():
+                        fig = go.Figure()
+                        
+                        # Data historis
                         fig.add_trace(go.Scatter(
-                            x=test_data.index,
-                            y=test_data.values,
+                            x=train_data.index,
+                            y=train_data.values,
                             mode='lines',
-                            name='Data Test (Aktual)',
-                            line=dict(color='#2ca02c', width=2)
+                            name='Data Training',
+                            line=dict(color='#1f77b4', width=2)
                         ))
                         
-                        # Prediksi test
+                        # Data test
+                        if len(test_data) > 0:
+                            fig.add_trace(go.Scatter(
+                                x=test_data.index,
+                                y=test_data.values,
+                                mode='lines',
+                                name='Data Test (Aktual)',
+                                line=dict(color='#2ca02c', width=2)
+                            ))
+                            
+                            # Prediksi test
+                            fig.add_trace(go.Scatter(
+                                x=test_data.index,
+                                y=predictions_test,
+                                mode='lines',
+                                name='Prediksi Test',
+                                line=dict(color='#ff7f0e', width=2, dash='dash')
+                            ))
+                        
+                        # Forecast future
                         fig.add_trace(go.Scatter(
-                            x=test_data.index,
-                            y=predictions_test,
+                            x=future_dates,
+                            y=forecast_future,
                             mode='lines',
-                            name='Prediksi Test',
-                            line=dict(color='#ff7f0e', width=2, dash='dash')
+                            name='Forecast Future',
+                            line=dict(color='#d62728', width=2, dash='dot')
                         ))
-                    
-                    # Forecast future
-                    fig.add_trace(go.Scatter(
-                        x=future_dates,
-                        y=forecast_future,
-                        mode='lines',
-                        name='Forecast Future',
-                        line=dict(color='#d62728', width=2, dash='dot')
-                    ))
-                    
-                    # Get confidence interval
-                    forecast_result = model_full_fit.get_forecast(steps=forecast_periods)
-                    forecast_ci = forecast_result.conf_int()
-                    
-                    # Add confidence interval
-                    fig.add_trace(go.Scatter(
-                        x=future_dates,
-                        y=forecast_ci.iloc[:, 1],
-                        mode='lines',
-                        name='Upper Bound',
-                        line=dict(width=0),
-                        showlegend=False
-                    ))
-                    
-                    fig.add_trace(go.Scatter(
-                        x=future_dates,
-                        y=forecast_ci.iloc[:, 0],
-                        mode='lines',
-                        name='Confidence Interval (95%)',
-                        fill='tonexty',
-                        fillcolor='rgba(214, 39, 40, 0.2)',
-                        line=dict(width=0)
-                    ))
-                    
-                    fig.update_layout(
-                        title='Forecasting Time Series dengan ARIMA',
-                        xaxis_title='Tanggal',
-                        yaxis_title=value_column,
-                        hovermode='x unified',
-                        height=500,
-                        template='plotly_white',
-                        legend=dict(
-                            orientation="h",
-                            yanchor="bottom",
-                            y=1.02,
-                            xanchor="right",
-                            x=1
+                        
+                        # Add confidence interval
+                        fig.add_trace(go.Scatter(
+                            x=future_dates,
+                            y=forecast_ci.iloc[:, 1],
+                            mode='lines',
+                            name='Upper Bound',
+                            line=dict(width=0),
+                            showlegend=False
+                        ))
+                        
+                        fig.add_trace(go.Scatter(
+                            x=future_dates,
+                            y=forecast_ci.iloc[:, 0],
+                            mode='lines',
+                            name='Confidence Interval (95%)',
+                            fill='tonexty',
+                            fillcolor='rgba(214, 39, 40, 0.2)',
+                            line=dict(width=0)
+                        ))
+                        
+                        fig.update_layout(
+                            title='Forecasting Time Series dengan ARIMA',
+                            xaxis_title='Tanggal',
+                            yaxis_title=value_column,
+                            hovermode='x unified',
+                            height=500,
+                            template='plotly_white',
+                            legend=dict(
+                                orientation="h",
+                                yanchor="bottom",
+                                y=1.02,
+                                xanchor="right",
+                                x=1
+                            )
                         )
-                    )
+                        return fig
                     
-                    st.plotly_chart(fig, use_container_width=True)
+                    st.plotly_chart(cached_figure('forecast', (forecast_key,), build_forecast_figure)[0], use_container_width=True)
                     
                     # Tabel hasil forecast
                     st.subheader("📋 Hasil Forecast Future")
@@ -415,54 +449,56 @@ if uploaded_file is not None:
                     
                     # Model summary
                     with st.expander("📝 Model Summary"):
-                        st.text(model_full_fit.summary())
+                        st.text(model_summary)
                     
                     # Residual analysis
                     with st.expander("🔬 Analisis Residual"):
-                        residuals = model_full_fit.resid
+                        def build_residual_figure():
+                            fig_residual = make_subplots(
+                                rows=1, cols=2,
+                                subplot_titles=('Residual Plot', 'Residual Distribution')
+                            )
                         
-                        fig_residual = make_subplots(
-                            rows=1, cols=2,
-                            subplot_titles=('Residual Plot', 'Residual Distribution')
-                        )
+                            # Residual plot
+                            fig_residual.add_trace(
+                                go.Scatter(
+                                    x=list(range(len(residuals))),
+                                    y=residuals,
+                                    mode='markers',
+                                    name='Residuals',
+                                    marker=dict(color='#1f77b4')
+                                ),
+                                row=1, col=1
+                            )
                         
-                        # Residual plot
-                        fig_residual.add_trace(
-                            go.Scatter(
-                                x=list(range(len(residuals))),
-                                y=residuals,
-                                mode='markers',
-                                name='Residuals',
-                                marker=dict(color='#1f77b4')
-                            ),
-                            row=1, col=1
-                        )
+                            # Histogram
+                            fig_residual.add_trace(
+                                go.Histogram(
+                                    x=residuals,
+                                    name='Distribution',
+                                    marker=dict(color='#ff7f0e')
+                                ),
+                                row=1, col=2
+                            )
                         
-                        # Histogram
-                        fig_residual.add_trace(
-                            go.Histogram(
-                                x=residuals,
-                                name='Distribution',
-                                marker=dict(color='#ff7f0e')
-                            ),
-                            row=1, col=2
-                        )
-                        
-                        fig_residual.update_layout(
-                            height=400,
-                            showlegend=False,
-                            template='plotly_white'
-                        )
+                            fig_residual.update_layout(
+                                height=400,
+                                showlegend=False,
+                                template='plotly_white'
+                            )
+                            return fig_residual
                         
-                        st.plotly_chart(fig_residual, use_container_width=True)
+                        st.plotly_chart(cached_figure('residual', (diagnostics_key,), build_residual_figure)[0], use_container_width=True)
                     
                 except Exception as e:
                     st.error(f"❌ Terjadi kesalahan: {str(e)}")
                     st.info("💡 Pastikan kolom yang dipilih memiliki format yang benar dan tidak ada missing values yang berlebihan.")
+        elif stages:
+            st.info("ℹ️ Pengaturan data atau model berubah. Klik \"🚀 Jalankan Forecasting\" untuk memperbarui hasil.")
     
     except Exception as e:
         st.error(f"❌ Error saat membaca file: {str(e)}")
-        st.info("💡 Pastikan file yang diupload adalah file CSV atau Excel yang valid.")
+        st.info("💡 Pastikan file yang diupload adalah file CSV, Parquet atau Excel yang valid.")
 
 else:
     # Landing page
@@ -0,0 +1,183 @@
+# Mesin indikator teknikal (SMA, EMA, RSI, MACD, Bollinger Bands, VWAP) yang
+# tervektorisasi dan inkremental. Setiap indikator adalah fungsi
+# step(frame, params, state, interval) -> (hasil, state baru): state menyimpan nilai terakhir
+# yang dibutuhkan (EMA terakhir, ekor jendela rolling, akumulasi VWAP), sehingga
+# saat bar baru datang hanya bar baru yang dihitung. Hasil dan state di-cache per
+# (ticker, interval, indikator, parameter). Tidak bergantung pada Streamlit.
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+from data_providers import INTRADAY_INTERVALS
+from scraper_engine import MAX_FETCH_WORKERS, BoundedCache
+
+INDICATOR_CACHE_MAX_MB = float(os.environ.get("YF_INDICATOR_CACHE_MAX_MB", 128))
+
+# Fungsi EMA rekursif y[t] = a * x[t] + (1 - a) * y[t-1] lewat lfilter (tanpa loop
+# Python). Tanpa nilai sebelumnya, EMA dimulai dari x[0] seperti ewm(adjust=False).
+def _ema(values, alpha, last=None):
+    if len(values) == 0:
+        return values, last
+    previous = values[0] if last is None else last
+    result, _ = lfilter([alpha], [1.0, alpha - 1.0], values, zi=[(1.0 - alpha) * previous])
+    return result, result[-1]
+
+# Fungsi rolling pada ekor jendela sebelumnya + nilai baru; mengembalikan hasil
+# untuk nilai baru saja dan ekor baru (window - 1 nilai terakhir)
+def _rolling(values, window, tail, how):
+    extended = np.concatenate([tail, values]) if tail is not None else values
+    rolling = pd.Series(extended).rolling(window)
+    result = rolling.mean() if how == 'mean' else rolling.std(ddof=0)
+    result = result.to_numpy()[len(extended) - len(values):]
+    return result, extended[-(window - 1):] if window > 1 else extended[:0]
+
+def sma(frame, params, state, interval):
+    (window,) = params
+    close = frame['Close'].to_numpy(dtype=float)
+    values, tail = _rolling(close, window, state, 'mean')
+    return pd.DataFrame({f'SMA {window}': values}, index=frame.index), tail
+
+def ema(frame, params, state, interval):
+    (span,) = params
+    values, last = _ema(frame['Close'].to_numpy(dtype=float), 2.0 / (span + 1), state)
+    return pd.DataFrame({f'EMA {span}': values}, index=frame.index), last
+
+def bollinger(frame, params, state, interval):
+    window, width = params
+    close = frame['Close'].to_numpy(dtype=float)
+    middle, tail = _rolling(close, window, state, 'mean')
+    deviation, _ = _rolling(close, window, state, 'std')
+    return pd.DataFrame({
+        f'BB Mid {window}': middle,
+        f'BB Upper {window}': middle + width * deviation,
+        f'BB Lower {window}': middle - width * deviation
+    }, index=frame.index), tail
+
+# RSI Wilder: rata-rata gain/loss dengan alpha = 1/period. Nilai baru muncul setelah
+# period perubahan harga, sama seperti definisi aslinya.
+def rsi(frame, params, state, interval):
+    (period,) = params
+    close = frame['Close'].to_numpy(dtype=float)
+    last_close, avg_gain, avg_loss, seen = state if state is not None else (None, None, None, 0)
+    if len(close) == 0:
+        return pd.DataFrame({f'RSI {period}': close}, index=frame.index), state
+    previous = np.concatenate([[last_close if last_close is not None else np.nan], close[:-1]])
+    change = close - previous
+    if last_close is None:
+        change = change[1:]
+    gain, avg_gain = _ema(np.clip(change, 0, None), 1.0 / period, avg_gain)
+    loss, avg_loss = _ema(np.clip(-change, 0, None), 1.0 / period, avg_loss)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = np.where(loss == 0, 100.0, 100.0 - 100.0 / (1.0 + gain / loss))
+    counts = seen + np.arange(1, len(values) + 1)
+    values = np.where(counts >= period, values, np.nan)
+    if last_close is None:
+        values = np.concatenate([[np.nan], values])
+    new_state = (close[-1], avg_gain, avg_loss, seen + len(change))
+    return pd.DataFrame({f'RSI {period}': values}, index=frame.index), new_state
+
+def macd(frame, params, state, interval):
+    fast, slow, signal = params
+    fast_last, slow_last, signal_last = state if state is not None else (None, None, None)
+    close = frame['Close'].to_numpy(dtype=float)
+    fast_values, fast_last = _ema(close, 2.0 / (fast + 1), fast_last)
+    slow_values, slow_last = _ema(close, 2.0 / (slow + 1), slow_last)
+    line = fast_values - slow_values
+    signal_values, signal_last = _ema(line, 2.0 / (signal + 1), signal_last)
+    return pd.DataFrame({
+        'MACD': line,
+        'MACD Signal': signal_values,
+        'MACD Hist': line - signal_values
+    }, index=frame.index), (fast_last, slow_last, signal_last)
+
+# VWAP dihitung ulang tiap sesi (hari bursa) untuk intraday; untuk harian ke atas
+# berupa anchored VWAP sejak bar pertama
+def vwap(frame, params, state, interval):
+    session_key, cum_pv, cum_volume = state if state is not None else (None, 0.0, 0.0)
+    if len(frame) == 0:
+        return pd.DataFrame({'VWAP': np.empty(0)}, index=frame.index), state
+    typical = (frame['High'].to_numpy(dtype=float) + frame['Low'].to_numpy(dtype=float) + frame['Close'].to_numpy(dtype=float)) / 3
+    volume = frame['Volume'].to_numpy(dtype=float)
+    if interval in INTRADAY_INTERVALS:
+        local_index = frame.index.tz_localize(None) if frame.index.tz is not None else frame.index
+        sessions = local_index.normalize().asi8
+    else:
+        sessions = np.zeros(len(frame), dtype=np.int64)
+    # Akumulasi per sesi: cumsum global dikurangi cumsum sebelum awal sesi. Sesi 0
+    # adalah lanjutan sesi dari state sebelumnya (offset negatif = tambah akumulasinya).
+    new_session = np.r_[session_key is None or sessions[0] != session_key, sessions[1:] != sessions[:-1]]
+    session_id = np.cumsum(new_session)
+    starts = np.flatnonzero(new_session)
+    traded = typical * volume
+    pv = np.cumsum(traded)
+    cum = np.cumsum(volume)
+    pv = pv - np.r_[-cum_pv, (pv - traded)[starts]][session_id]
+    cum = cum - np.r_[-cum_volume, (cum - volume)[starts]][session_id]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = np.where(cum > 0, pv / cum, np.nan)
+    return pd.DataFrame({'VWAP': values}, index=frame.index), (sessions[-1], pv[-1], cum[-1])
+
+# Daftar indikator: nama -> (fungsi step, parameter default, tampil di panel harga?)
+INDICATORS = {
+    'SMA': (sma, (20,), True),
+    'EMA': (ema, (20,), True),
+    'Bollinger Bands': (bollinger, (20, 2.0), True),
+    'VWAP': (vwap, (), True),
+    'RSI': (rsi, (14,), False),
+    'MACD': (macd, (12, 26, 9), False)
+}
+
+INDICATOR_CACHE = BoundedCache(int(INDICATOR_CACHE_MAX_MB * 1024 * 1024))
+
+def get_indicator_cache():
+    return INDICATOR_CACHE
+
+# Fungsi untuk menghitung satu indikator secara inkremental. State yang disimpan
+# adalah state sebelum bar terakhir, karena bar terakhir bisa berubah (bar live yang
+# belum final); bar terakhir dan bar baru selalu dihitung dari state tersebut.
+# Jika awal histori atau bar yang sudah final berubah (mis. penyesuaian dividen),
+# indikator dihitung ulang dari awal.
+def compute_indicator(ticker, interval, hist, name, params=None):
+    step, default_params, _ = INDICATORS[name]
+    params = tuple(params) if params is not None else default_params
+    key = (ticker, interval, name, params)
+    start, state, prefix = 0, None, None
+    cached = INDICATOR_CACHE.get(key)
+    if cached is not None:
+        result, cached_state, committed_index, committed_close = cached
+        committed = len(result) - 1
+        if (
+            0 < committed < len(hist)
+            and hist.index[0] == result.index[0]
+            and hist.index[committed - 1] == committed_index
+            and hist['Close'].iat[committed - 1] == committed_close
+        ):
+            start, state, prefix = committed, cached_state, result.iloc[:committed]
+    
+    body, body_state = step(hist.iloc[start:-1], params, state, interval)
+    last, _ = step(hist.iloc[-1:], params, body_state, interval)
+    result = pd.concat([frame for frame in (prefix, body, last) if frame is not None])
+    if len(hist) > 1:
+        INDICATOR_CACHE.put(key, (result, body_state, hist.index[-2], hist['Close'].iat[-2]))
+    return result
+
+# Fungsi untuk menghitung beberapa indikator sekaligus; specs = {nama: parameter}
+def compute_indicators(ticker, interval, hist, specs):
+    if hist.empty:
+        return pd.DataFrame(index=hist.index)
+    frames = [compute_indicator(ticker, interval, hist, name, params) for name, params in specs.items()]
+    return pd.concat(frames, axis=1) if frames else pd.DataFrame(index=hist.index)
+
+# Fungsi untuk menghitung indikator banyak ticker secara paralel (NumPy/SciPy
+# melepas GIL pada sebagian besar perhitungan); frames = {ticker: histori}
+def compute_indicators_many(frames, interval, specs, max_workers=MAX_FETCH_WORKERS):
+    workers = max(1, min(max_workers, len(frames)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            ticker: executor.submit(compute_indicators, ticker, interval, hist, specs)
+            for ticker, hist in frames.items()
+        }
+        return {ticker: future.result() for ticker, future in futures.items()}
@@ -0,0 +1,126 @@
+# Instrumentasi per request: waktu tiap tahap, cache hit/miss, jumlah baris dan
+# ukuran payload (figure/tabel) yang dikirim ke browser. Satu request = satu
+# RequestTrace yang disimpan di contextvar, sehingga mesin data bisa mencatat
+# tahapnya sendiri tanpa parameter tambahan. Saat selesai, trace ditulis sebagai
+# satu baris JSON ke logger "yfscraper.metrics" (ke file jika YF_METRICS_LOG diisi).
+from contextlib import contextmanager
+import contextvars
+import io
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+import pyarrow as pa
+
+METRICS_LOGGER = logging.getLogger("yfscraper.metrics")
+
+YF_METRICS_LOG = os.environ.get("YF_METRICS_LOG")
+if YF_METRICS_LOG and not METRICS_LOGGER.handlers:
+    _handler = logging.FileHandler(YF_METRICS_LOG)
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    METRICS_LOGGER.addHandler(_handler)
+    METRICS_LOGGER.setLevel(logging.INFO)
+
+_CURRENT_TRACE = contextvars.ContextVar('request_trace', default=None)
+
+class RequestTrace:
+    def __init__(self, name, measure_payload=False, **attrs):
+        self.trace_id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.attrs = attrs
+        # Ukuran payload dihitung dengan serialisasi tambahan, jadi hanya jika diminta
+        self.measure_payload = measure_payload
+        self.started_at = time.time()
+        self.stages = []
+        self.total_ms = None
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+    
+    # Mencatat satu tahap; field tambahan (rows, bytes, cache, ...) bisa diisi ke
+    # dict yang di-yield selama tahap berjalan
+    @contextmanager
+    def stage(self, name, **fields):
+        record = {'stage': name, **fields}
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException as e:
+            record['error'] = type(e).__name__
+            raise
+        finally:
+            record['ms'] = round((time.perf_counter() - start) * 1000, 3)
+            record['offset_ms'] = round((start - self._start) * 1000, 3)
+            with self._lock:
+                self.stages.append(record)
+    
+    def event(self, name, **fields):
+        record = {'stage': name, 'offset_ms': round((time.perf_counter() - self._start) * 1000, 3), **fields}
+        with self._lock:
+            self.stages.append(record)
+    
+    def to_dict(self):
+        with self._lock:
+            stages = sorted(self.stages, key=lambda record: record['offset_ms'])
+        return {
+            'trace_id': self.trace_id,
+            'name': self.name,
+            'started_at': self.started_at,
+            'total_ms': self.total_ms,
+            **self.attrs,
+            'stages': stages
+        }
+
+def start_trace(name, measure_payload=False, **attrs):
+    trace = RequestTrace(name, measure_payload, **attrs)
+    _CURRENT_TRACE.set(trace)
+    return trace
+
+def current_trace():
+    return _CURRENT_TRACE.get()
+
+# Menutup trace: hitung total waktu, tulis log JSON, dan lepas dari context
+def finish_trace(trace):
+    trace.total_ms = round((time.perf_counter() - trace._start) * 1000, 3)
+    if METRICS_LOGGER.isEnabledFor(logging.INFO):
+        METRICS_LOGGER.info(json.dumps(trace.to_dict(), default=str))
+    if _CURRENT_TRACE.get() is trace:
+        _CURRENT_TRACE.set(None)
+    return trace
+
+# Versi modul dari RequestTrace.stage: tanpa trace aktif tetap berjalan tanpa mencatat
+@contextmanager
+def stage(name, **fields):
+    trace = _CURRENT_TRACE.get()
+    if trace is None:
+        yield dict(fields)
+        return
+    with trace.stage(name, **fields) as record:
+        yield record
+
+def event(name, **fields):
+    trace = _CURRENT_TRACE.get()
+    if trace is not None:
+        trace.event(name, **fields)
+
+# Fungsi untuk menjalankan fn di executor dengan trace yang sama seperti pemanggil
+def submit_with_context(executor, fn, *args, **kwargs):
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+def payload_enabled():
+    trace = _CURRENT_TRACE.get()
+    return trace is not None and trace.measure_payload
+
+# Ukuran figure Plotly setelah diserialisasi ke JSON (format yang dikirim ke browser)
+def figure_bytes(fig):
+    return len(fig.to_json().encode('utf-8'))
+
+# Ukuran tabel setelah diserialisasi ke Arrow IPC (format yang dipakai st.dataframe)
+def frame_bytes(frame):
+    table = pa.Table.from_pandas(frame)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.tell()
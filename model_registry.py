@@ -0,0 +1,129 @@
+# Registry model forecasting di disk. Model ARIMA yang sudah di-fit (order, seasonal
+# order, parameter, dan state hasil filter) disimpan sebagai pickle, dengan kunci
+# sidik jari isi series + spesifikasi model (rasio training, seasonal, m, metode
+# pencarian). Klik "Jalankan Forecasting" berikutnya dengan data dan pengaturan yang
+# sama langsung memakai model tersimpan tanpa pencarian order maupun fitting.
+# Entri dihapus bila terlalu lama tidak dipakai atau total ukurannya melewati batas.
+import json
+import os
+import pickle
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+from pmdarima.arima import ARIMA
+
+from fingerprint import data_fingerprint
+
+MODEL_STORE_DIR = Path(os.environ.get("FORECAST_MODEL_DIR", ".forecast_models"))
+MODEL_MAX_AGE_DAYS = float(os.environ.get("FORECAST_MODEL_MAX_AGE_DAYS", 30))
+MODEL_STORE_MAX_MB = float(os.environ.get("FORECAST_MODEL_MAX_MB", 256))
+
+_REGISTRY_LOCK = threading.Lock()
+
+# Fungsi untuk membuat kunci (spesifikasi, data) sebuah model
+def model_key(data, spec):
+    return data_fingerprint(sorted(spec.items())), data_fingerprint(data)
+
+def get_model_path(spec_key, data_key):
+    return MODEL_STORE_DIR / f"{spec_key}_{data_key}.pkl"
+
+def _read_model(path):
+    try:
+        with open(path, 'rb') as handle:
+            model = pickle.load(handle)
+    except Exception:
+        return None
+    # Waktu akses diperbarui agar eviksi mengutamakan model yang lama tidak dipakai;
+    # file bisa saja sudah dihapus eviksi sesi lain, model yang dimuat tetap dipakai
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return model
+
+# Fungsi untuk memuat model yang cocok persis dengan data dan spesifikasi
+def load_model(data, spec):
+    path = get_model_path(*model_key(data, spec))
+    return _read_model(path) if path.exists() else None
+
+# Fungsi untuk mencari model tersimpan dengan spesifikasi sama yang datanya adalah
+# awal dari data sekarang (hanya ada baris baru di akhir). Mengembalikan
+# (model, jumlah baris data lama) dari yang terpanjang, atau (None, 0).
+def find_appended_model(data, spec):
+    spec_key = data_fingerprint(sorted(spec.items()))
+    matches = []
+    for meta_path in MODEL_STORE_DIR.glob(f"{spec_key}_*.json"):
+        try:
+            meta = json.loads(meta_path.read_text())
+        except Exception:
+            continue
+        if 0 < meta['rows'] < len(data):
+            matches.append((meta['rows'], meta_path.with_suffix('.pkl'), meta['data_key']))
+    for rows, path, data_key in sorted(matches, reverse=True):
+        if data_fingerprint(data.iloc[:rows]) == data_key:
+            model = _read_model(path)
+            if model is not None:
+                return model, rows
+    return None, 0
+
+# Fungsi untuk memperbarui model lama pada data training yang bertambah: order tetap,
+# parameter lama dipakai sebagai titik awal optimasi (satu fit, tanpa pencarian order)
+def update_appended_model(model, train_data):
+    return ARIMA(
+        order=model.order,
+        seasonal_order=model.seasonal_order,
+        with_intercept=model.with_intercept,
+        start_params=model.params(),
+        method='lbfgs',
+        maxiter=50,
+        suppress_warnings=True
+    ).fit(train_data)
+
+# Fungsi untuk menyimpan model secara atomik beserta metadata (JSON) lalu menjalankan eviksi
+def save_model(data, spec, model):
+    spec_key, data_key = model_key(data, spec)
+    path = get_model_path(spec_key, data_key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f'.pkl.{threading.get_ident()}.tmp')
+    with open(tmp_path, 'wb') as handle:
+        pickle.dump(model, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    meta = {
+        'data_key': data_key,
+        'rows': len(data),
+        'spec': spec,
+        'order': list(model.order),
+        'seasonal_order': list(model.seasonal_order),
+        'aic': float(model.aic()),
+        'saved_at': pd.Timestamp.now().isoformat()
+    }
+    path.with_suffix('.json').write_text(json.dumps(meta))
+    evict_models()
+
+# Fungsi untuk menghapus model yang melewati batas umur, lalu model yang paling lama
+# tidak dipakai sampai total ukuran di bawah batas
+def evict_models(max_age_days=None, max_mb=None):
+    max_age_days = MODEL_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    max_bytes = (MODEL_STORE_MAX_MB if max_mb is None else max_mb) * 1024 * 1024
+    removed = 0
+    with _REGISTRY_LOCK:
+        entries = []
+        for path in MODEL_STORE_DIR.glob("*.pkl"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        cutoff = time.time() - max_age_days * 86400
+        for mtime, size, path in entries:
+            if mtime >= cutoff and total <= max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            path.with_suffix('.json').unlink(missing_ok=True)
+            total -= size
+            removed += 1
+    return removed
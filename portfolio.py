@@ -0,0 +1,152 @@
+# Statistik portofolio: matriks korelasi/kovarians return, korelasi rolling dan
+# volatilitas portofolio dari bobot. Return semua ticker disejajarkan menjadi satu
+# array 2-D (bar x ticker) dan matriksnya dibangun dari statistik cukup per pasangan
+# (jumlah bar bersama, jumlah, jumlah kuadrat, jumlah perkalian) lewat perkalian
+# matriks. Statistik ini bisa ditambah/dikurangi, jadi bar baru, bar yang keluar dari
+# jendela periode, dan ticker baru diperbarui tanpa menghitung ulang O(N²) dari awal.
+# Tidak bergantung pada Streamlit.
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Jumlah bar bersama minimum agar kovarians/korelasi sepasang ticker dihitung
+MIN_PERIODS = 2
+
+# Fungsi untuk menyejajarkan return sederhana semua ticker pada gabungan index.
+# Return tiap ticker dihitung dari bar miliknya sendiri; NaN = tidak ada bar.
+def aligned_returns(histories):
+    returns = {}
+    for ticker, hist in histories.items():
+        close = hist['Close'].to_numpy(dtype=float)
+        returns[ticker] = pd.Series(close[1:] / close[:-1] - 1, index=hist.index[1:])
+    if not returns:
+        return pd.DataFrame()
+    return pd.concat(returns, axis=1, join='outer', copy=False).sort_index()
+
+# Fungsi untuk menghitung statistik cukup pasangan (ticker di block x ticker di
+# other) dari potongan return; hasil berbentuk (4, kolom block, kolom other):
+# jumlah bar bersama, Σx, Σx² (x dari block, hanya bar yang other juga ada) dan Σxy
+def pair_sums(block, other=None):
+    other = block if other is None else other
+    mask = ~np.isnan(block)
+    other_mask = ~np.isnan(other)
+    x = np.where(mask, block, 0.0)
+    y = np.where(other_mask, other, 0.0)
+    present = other_mask.astype(float)
+    return np.stack([
+        mask.astype(float).T @ present,
+        x.T @ present,
+        (x * x).T @ present,
+        x.T @ y
+    ])
+
+# Fungsi untuk mengubah statistik cukup menjadi matriks kovarians dan korelasi
+# (pasangan lengkap, sama seperti DataFrame.cov()/corr())
+def covariance_from_sums(sums):
+    count, sum_x, sum_xx, sum_xy = sums
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = (sum_xy - sum_x * sum_x.T / count) / (count - 1)
+        variance = (sum_xx - sum_x ** 2 / count) / (count - 1)
+        correlation = covariance / np.sqrt(variance * variance.T)
+    valid = count >= MIN_PERIODS
+    covariance = np.where(valid, covariance, np.nan)
+    correlation = np.where(valid, np.clip(correlation, -1.0, 1.0), np.nan)
+    np.fill_diagonal(correlation, np.where(np.diag(valid), 1.0, np.nan))
+    return covariance, correlation
+
+# Statistik korelasi/kovarians yang diperbarui secara inkremental. Bar terakhir
+# gabungan index dianggap belum final (bisa direvisi oleh polling live), jadi tidak
+# masuk statistik tersimpan dan ditambahkan saat matriks diminta.
+class PortfolioStats:
+    def __init__(self):
+        self.tickers = []
+        self.returns = pd.DataFrame()
+        self.pending = pd.DataFrame()
+        self._sums = np.zeros((4, 0, 0))
+        self._lock = threading.Lock()
+    
+    # Fungsi untuk menyinkronkan statistik dengan histori terbaru;
+    # histories = {ticker: DataFrame OHLCV}. Mengembalikan ringkasan pekerjaan.
+    def update(self, histories):
+        aligned = aligned_returns(histories)
+        with self._lock:
+            return self._update(aligned)
+    
+    def _update(self, aligned):
+        committed, pending = aligned.iloc[:-1], aligned.iloc[-1:]
+        old = self.returns
+        
+        # Bar yang sudah keluar dari jendela periode dikurangi dari statistik
+        dropped_rows = ~old.index.isin(committed.index)
+        if dropped_rows.any():
+            self._sums -= pair_sums(old.to_numpy()[dropped_rows])
+            old = old[~dropped_rows]
+        
+        # Ticker yang dihapus, atau yang return lamanya berubah (mis. penyesuaian
+        # dividen/split), dikeluarkan; ticker yang berubah dihitung ulang sebagai baru
+        candidates = [ticker for ticker in self.tickers if ticker in committed]
+        previous = old[candidates].to_numpy()
+        current = committed[candidates].reindex(old.index).to_numpy()
+        unchanged = ((previous == current) | (np.isnan(previous) & np.isnan(current))).all(axis=0)
+        kept = [ticker for ticker, same in zip(candidates, unchanged) if same]
+        keep = [self.tickers.index(ticker) for ticker in kept]
+        self._sums = self._sums[:, keep][:, :, keep]
+        
+        # Bar baru untuk ticker lama: O(bar baru x N²)
+        new_rows = ~committed.index.isin(old.index)
+        if new_rows.any() and kept:
+            self._sums += pair_sums(committed[kept].to_numpy()[new_rows])
+        
+        # Ticker baru: hanya baris/kolomnya sendiri, O(bar x N)
+        added = [ticker for ticker in committed.columns if ticker not in kept]
+        if added and not kept:
+            self._sums = pair_sums(committed[added].to_numpy())
+        elif added:
+            values = committed[kept + added].to_numpy()
+            new_values = values[:, len(kept):]
+            sums = np.zeros((4, len(kept) + len(added), len(kept) + len(added)))
+            sums[:, :len(kept), :len(kept)] = self._sums
+            sums[:, len(kept):, :] = pair_sums(new_values, values)
+            sums[:, :, len(kept):] = pair_sums(values, new_values)
+            self._sums = sums
+        
+        self.tickers = kept + added
+        self.returns = committed[self.tickers]
+        self.pending = pending[self.tickers]
+        return {'new_bars': int(new_rows.sum()), 'dropped_bars': int(dropped_rows.sum()), 'recomputed': added}
+    
+    def _current_sums(self):
+        if self.pending.empty:
+            return self._sums
+        return self._sums + pair_sums(self.pending.to_numpy())
+    
+    # Fungsi untuk mendapatkan matriks kovarians dan korelasi sebagai DataFrame;
+    # kovarians dikalikan periods_per_year bila ingin versi tahunan
+    def matrices(self, periods_per_year=1):
+        with self._lock:
+            sums, tickers = self._current_sums(), list(self.tickers)
+        covariance, correlation = covariance_from_sums(sums)
+        return (
+            pd.DataFrame(covariance * periods_per_year, index=tickers, columns=tickers),
+            pd.DataFrame(correlation, index=tickers, columns=tickers)
+        )
+    
+    def all_returns(self):
+        with self._lock:
+            return pd.concat([self.returns, self.pending])
+
+# Fungsi untuk menghitung volatilitas portofolio (tahunan, pecahan) dari matriks
+# kovarians tahunan dan bobot {ticker: bobot}; bobot dinormalisasi menjadi total 1.
+# Juga mengembalikan kontribusi risiko tiap ticker (pecahan dari varians portofolio).
+def portfolio_volatility(covariance, weights):
+    w = pd.Series(weights, dtype=float).reindex(covariance.index).fillna(0.0).to_numpy()
+    total = w.sum()
+    if total == 0:
+        return np.nan, pd.Series(np.nan, index=covariance.index)
+    w = w / total
+    cov = np.nan_to_num(covariance.to_numpy())
+    marginal = cov @ w
+    variance = float(w @ marginal)
+    contribution = w * marginal / variance if variance > 0 else np.full(len(w), np.nan)
+    return np.sqrt(max(variance, 0.0)), pd.Series(contribution, index=covariance.index)
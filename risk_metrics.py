@@ -0,0 +1,149 @@
+# Mesin metrik risiko rolling yang tervektorisasi (NumPy/pandas).
+# Semua fungsi menerima harga/return berbentuk Series (satu ticker), DataFrame,
+# atau array 2-D berukuran (jumlah bar x jumlah ticker) sehingga banyak ticker
+# dihitung sekaligus tanpa loop Python per bar. Return dalam bentuk pecahan
+# (0.01 = 1%).
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Jumlah bar per tahun untuk interval harian ke atas
+PERIODS_PER_YEAR = {
+    "1d": 252,
+    "5d": 52,
+    "1wk": 52,
+    "1mo": 12,
+    "3mo": 4
+}
+
+TRADING_DAYS_PER_YEAR = 252
+
+# Batas jumlah elemen jendela yang diproses sekaligus pada CVaR rolling
+_WINDOW_BLOCK_ELEMENTS = 8_000_000
+
+def _as_frame(values):
+    if isinstance(values, (pd.Series, pd.DataFrame)):
+        # Histori ringkas bisa berisi float32/integer; perhitungan tetap di float64
+        return values.astype(float, copy=False)
+    values = np.asarray(values, dtype=float)
+    return pd.Series(values) if values.ndim == 1 else pd.DataFrame(values)
+
+# Fungsi untuk menentukan faktor annualisasi. Untuk interval intraday, jumlah bar
+# per hari diperkirakan dari data (median bar per tanggal) karena jam bursa berbeda-beda.
+def periods_per_year(interval, index=None):
+    if interval in PERIODS_PER_YEAR:
+        return PERIODS_PER_YEAR[interval]
+    if index is None or len(index) == 0:
+        return TRADING_DAYS_PER_YEAR
+    bars_per_day = pd.Series(1, index=index.normalize()).groupby(level=0).size().median()
+    return TRADING_DAYS_PER_YEAR * float(bars_per_day)
+
+def simple_returns(prices):
+    return _as_frame(prices).pct_change()
+
+def rolling_volatility(returns, window, periods_per_year):
+    return _as_frame(returns).rolling(window).std() * np.sqrt(periods_per_year)
+
+def rolling_sharpe(returns, window, periods_per_year, risk_free=0.0):
+    excess = _as_frame(returns) - risk_free / periods_per_year
+    rolling = excess.rolling(window)
+    std = rolling.std()
+    return (rolling.mean() / std.where(std != 0)) * np.sqrt(periods_per_year)
+
+# Sortino memakai downside deviation: akar rata-rata kuadrat return negatif
+def rolling_sortino(returns, window, periods_per_year, risk_free=0.0):
+    excess = _as_frame(returns) - risk_free / periods_per_year
+    downside = np.sqrt((excess.clip(upper=0) ** 2).rolling(window).mean())
+    return (excess.rolling(window).mean() / downside.where(downside != 0)) * np.sqrt(periods_per_year)
+
+# Fungsi untuk menghitung drawdown (pecahan negatif dari puncak sebelumnya)
+def drawdown(prices):
+    prices = _as_frame(prices)
+    running_max = np.fmax.accumulate(prices.to_numpy(dtype=float), axis=0)
+    return prices / running_max - 1
+
+# Fungsi untuk menghitung lama drawdown: jumlah bar sejak puncak terakhir
+def drawdown_duration(prices):
+    prices = _as_frame(prices)
+    values = prices.to_numpy(dtype=float)
+    running_max = np.fmax.accumulate(values, axis=0)
+    positions = np.arange(len(values)).reshape((-1,) + (1,) * (values.ndim - 1))
+    at_peak = ~(values < running_max)
+    last_peak = np.maximum.accumulate(np.where(at_peak, positions, 0), axis=0)
+    duration = positions - last_peak
+    if isinstance(prices, pd.Series):
+        return pd.Series(duration, index=prices.index, name=prices.name)
+    return pd.DataFrame(duration, index=prices.index, columns=prices.columns)
+
+def max_drawdown(prices):
+    return drawdown(prices).min()
+
+def max_drawdown_duration(prices):
+    return drawdown_duration(prices).max()
+
+# VaR historis: kerugian pada kuantil (1 - level), dilaporkan sebagai angka positif
+def value_at_risk(returns, level=0.95):
+    return -_as_frame(returns).quantile(1 - level)
+
+# CVaR (expected shortfall): rata-rata kerugian yang melewati VaR
+def conditional_value_at_risk(returns, level=0.95):
+    returns = _as_frame(returns)
+    threshold = returns.quantile(1 - level)
+    return -returns.where(returns.le(threshold)).mean()
+
+# Fungsi untuk menghitung korelasi rolling setiap kolom return terhadap satu return
+# acuan (mis. satu ticker atau portofolio). Bar yang kosong pada salah satu sisi
+# dilewati, cukup separuh jendela terisi agar nilai dihitung.
+def rolling_correlation(returns, reference, window):
+    return _as_frame(returns).rolling(window, min_periods=max(2, window // 2)).corr(_as_frame(reference))
+
+def rolling_value_at_risk(returns, window, level=0.95):
+    return -_as_frame(returns).rolling(window).quantile(1 - level, interpolation='lower')
+
+# CVaR rolling: VaR rolling (kuantil 'lower' = observasi ke-k terkecil, q) dihitung
+# pandas, lalu jumlah k observasi terkecil tiap jendela = sum(min(x, q)) - (w - k) * q.
+# Jendela dibentuk dengan sliding_window_view (tanpa salinan) dan diproses per blok
+# agar memori tetap terbatas pada histori yang sangat panjang.
+def rolling_conditional_value_at_risk(returns, window, level=0.95):
+    returns = _as_frame(returns)
+    values = returns.to_numpy(dtype=float)
+    squeeze = values.ndim == 1
+    if squeeze:
+        values = values[:, None]
+    n_rows, n_cols = values.shape
+    result = np.full((n_rows, n_cols), np.nan)
+    if n_rows >= window:
+        tail = int(np.floor((1 - level) * (window - 1))) + 1
+        threshold = -rolling_value_at_risk(values, window, level).to_numpy()[window - 1:].T
+        # Data per ticker dibuat contiguous agar tiap jendela bersebelahan di memori
+        windows = sliding_window_view(np.ascontiguousarray(values.T), window, axis=-1)
+        block = max(1, _WINDOW_BLOCK_ELEMENTS // (window * n_cols))
+        for start in range(0, windows.shape[1], block):
+            chunk = windows[:, start:start + block]
+            chunk_threshold = threshold[:, start:start + block]
+            tail_sum = np.minimum(chunk, chunk_threshold[..., None]).sum(axis=-1) - (window - tail) * chunk_threshold
+            result[window - 1 + start:window - 1 + start + chunk.shape[1]] = (-tail_sum / tail).T
+    if squeeze:
+        return pd.Series(result[:, 0], index=returns.index, name=returns.name)
+    return pd.DataFrame(result, index=returns.index, columns=returns.columns)
+
+# Fungsi untuk meringkas metrik risiko seluruh periode per ticker
+def risk_summary(prices, periods_per_year, level=0.95):
+    prices = _as_frame(prices)
+    frame = prices.to_frame() if isinstance(prices, pd.Series) else prices
+    returns = frame.pct_change()
+    mean = returns.mean()
+    std = returns.std()
+    downside = np.sqrt((returns.clip(upper=0) ** 2).mean())
+    first = frame.bfill().iloc[0]
+    last = frame.ffill().iloc[-1]
+    return pd.DataFrame({
+        'Total Return': last / first - 1,
+        'Volatility (Ann.)': std * np.sqrt(periods_per_year),
+        'Sharpe (Ann.)': mean / std.where(std != 0) * np.sqrt(periods_per_year),
+        'Sortino (Ann.)': mean / downside.where(downside != 0) * np.sqrt(periods_per_year),
+        'Max Drawdown': max_drawdown(frame),
+        'Max DD Duration (bars)': max_drawdown_duration(frame),
+        'VaR': value_at_risk(returns, level),
+        'CVaR': conditional_value_at_risk(returns, level)
+    })
@@ -0,0 +1,920 @@
+# Mesin data Yahoo Finance: pengambilan, cache, statistik, dan ekspor.
+# Modul ini tidak bergantung pada Streamlit/Plotly sehingga bisa dipakai oleh
+# halaman Streamlit maupun job terjadwal lewat CLI:
+#
+#   python scraper_engine.py BBCA.JK BBRI.JK --period 1y --output-dir data/
+from yfinance.exceptions import YFChartError, YFException
+import pandas as pd
+import numpy as np
+from datetime import datetime, timedelta
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from collections import OrderedDict
+from pathlib import Path
+import argparse
+import gzip
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import weakref
+
+import pyarrow.parquet as pq
+
+from data_providers import INTRADAY_INTERVALS, ChartHTTPError, create_provider, get_data_provider, set_data_provider
+from instrumentation import submit_with_context
+import instrumentation
+import risk_metrics
+
+# Jumlah maksimum request paralel ke Yahoo Finance
+MAX_FETCH_WORKERS = 16
+
+# Lokasi penyimpanan lokal histori harga (satu file Parquet per ticker+interval)
+DATA_STORE_DIR = Path(os.environ.get("YF_STORE_DIR", ".yf_store"))
+
+# Batas Yahoo untuk data intraday: (panjang maksimum satu request, seberapa jauh ke belakang)
+INTRADAY_LIMITS = {
+    "1m": (timedelta(days=7), timedelta(days=30)),
+    "2m": (timedelta(days=60), timedelta(days=60)),
+    "5m": (timedelta(days=60), timedelta(days=60)),
+    "15m": (timedelta(days=60), timedelta(days=60)),
+    "30m": (timedelta(days=60), timedelta(days=60)),
+    "60m": (timedelta(days=730), timedelta(days=730)),
+    "90m": (timedelta(days=60), timedelta(days=60)),
+    "1h": (timedelta(days=730), timedelta(days=730))
+}
+
+# Rentang waktu yang harus tersedia di penyimpanan untuk tiap periode preset.
+# 1d/5d dihitung dalam hari bursa, jadi diberi cadangan untuk akhir pekan dan libur.
+PERIOD_LOOKBACK = {
+    "1d": pd.DateOffset(days=7),
+    "5d": pd.DateOffset(days=14),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10)
+}
+
+ACTION_COLUMNS = ['Dividends', 'Stock Splits']
+
+# Lock per ticker+interval agar satu file tidak di-update dua kali bersamaan
+_STORE_LOCKS = {}
+
+# Histori tersimpan yang baru diperbarui tidak diminta ulang ke provider selama
+# jeda ini (detik), mis. saat interval turunan dibangun dari interval dasar yang sama
+STORE_REFRESH_SECONDS = float(os.environ.get("YF_STORE_REFRESH_SECONDS", 300))
+_LAST_REFRESH = {}
+
+# Batas request global ke Yahoo (token per detik dan ukuran burst)
+YF_RATE_LIMIT = float(os.environ.get("YF_RATE_LIMIT", 20))
+YF_RATE_BURST = int(os.environ.get("YF_RATE_BURST", 40))
+
+# Percobaan ulang untuk error sementara (jaringan, throttling, 5xx) dengan
+# exponential backoff + jitter: jeda acak antara 0 dan min(max, base * 2^n) detik
+FETCH_RETRIES = int(os.environ.get("YF_FETCH_RETRIES", 3))
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+SYMBOL_NOT_FOUND_PATTERN = re.compile(r"not found|delisted", re.IGNORECASE)
+
+# Error pengambilan data yang membawa penyebab aslinya
+class FetchError(Exception):
+    def __init__(self, ticker, cause):
+        super().__init__(str(cause) or type(cause).__name__)
+        self.ticker = ticker
+        self.cause = cause
+
+# Rate limiter token bucket yang dipakai bersama oleh semua thread
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+# Penggabung request: pemanggil dengan key yang sama selama request masih berjalan
+# menunggu hasil request pertama alih-alih membuat request baru
+class RequestCoalescer:
+    def __init__(self):
+        self._in_flight = {}
+        self._lock = threading.Lock()
+    
+    def run(self, key, fn):
+        with self._lock:
+            future = self._in_flight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._in_flight[key] = future
+        if not is_leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+RATE_LIMITER = TokenBucket(YF_RATE_LIMIT, YF_RATE_BURST)
+IN_FLIGHT = RequestCoalescer()
+
+# Penolakan eksplisit dari Yahoo bahwa simbol tidak ada ("Not Found", "delisted")
+# dan HTTP 4xx selain 429 bersifat permanen; selain itu dianggap sementara dan layak
+# dicoba ulang. YFTzMissingError/YFPricesMissingError ("possibly delisted") hanya
+# tebakan yfinance dari respons kosong, yang juga muncul saat request dibatasi Yahoo.
+def is_retryable(error):
+    if isinstance(error, YFChartError):
+        return SYMBOL_NOT_FOUND_PATTERN.search(str(error)) is None
+    if isinstance(error, YFException):
+        return True
+    if isinstance(error, ChartHTTPError):
+        return error.status_code == 429 or error.status_code >= 500
+    return True
+
+def call_with_retry(fn, retries=None):
+    retries = FETCH_RETRIES if retries is None else retries
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == retries or not is_retryable(e):
+                raise
+            time.sleep(random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt)))
+
+# Satu-satunya pintu request histori ke provider data: rate limit global, retry dengan
+# backoff, dan error asli dibungkus FetchError. "Tidak ada data" bukan error.
+def request_history(ticker, interval, start=None, end=None, period=None):
+    provider = get_data_provider()
+    
+    def attempt():
+        if provider.rate_limited:
+            RATE_LIMITER.acquire()
+        with instrumentation.stage('provider.history', provider=provider.name, ticker=ticker, interval=interval) as record:
+            hist = provider.history(ticker, interval, start=start, end=end, period=period)
+            record['rows'] = len(hist)
+        return hist
+    
+    try:
+        return call_with_retry(attempt)
+    except Exception as e:
+        raise FetchError(ticker, e) from e
+
+# Fungsi untuk menentukan tanggal awal data yang dibutuhkan (None = seluruh histori)
+def resolve_fetch_start(period, start):
+    if not period:
+        return pd.Timestamp(start)
+    if period == "max":
+        return None
+    today = pd.Timestamp.now().normalize()
+    if period == "ytd":
+        return pd.Timestamp(today.year, 1, 1)
+    return today - PERIOD_LOOKBACK[period]
+
+# Fungsi untuk membuat nama file yang aman dari ticker (mis. ^JKSE, EURUSD=X)
+def safe_file_name(ticker):
+    return re.sub(r'[^A-Za-z0-9._-]', '_', ticker)
+
+def get_store_path(ticker, interval):
+    namespace = get_data_provider().store_namespace
+    store_dir = DATA_STORE_DIR / namespace if namespace else DATA_STORE_DIR
+    return store_dir / f"{safe_file_name(ticker)}_{interval}.parquet"
+
+# Fungsi untuk membaca histori yang tersimpan beserta awal cakupannya
+def load_stored_history(ticker, interval):
+    path = get_store_path(ticker, interval)
+    meta_path = path.with_suffix('.json')
+    if not path.exists() or not meta_path.exists():
+        return None, None
+    try:
+        # Kolom tetap berupa view read-only ke buffer Arrow (tanpa salinan konsolidasi)
+        hist = pq.read_table(path).to_pandas(split_blocks=True, self_destruct=True)
+        covered_from = json.loads(meta_path.read_text())['covered_from']
+    except Exception:
+        return None, None
+    if hist.empty:
+        return None, None
+    return hist, (pd.Timestamp(covered_from) if covered_from else None)
+
+# Fungsi untuk menyimpan histori secara atomik (tulis ke file sementara lalu rename)
+def save_stored_history(ticker, interval, hist, covered_from):
+    path = get_store_path(ticker, interval)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f'.parquet.{threading.get_ident()}.tmp')
+    with instrumentation.stage('store.write', ticker=ticker, interval=interval, rows=len(hist)) as record:
+        hist.to_parquet(tmp_path)
+        record['bytes'] = tmp_path.stat().st_size
+    os.replace(tmp_path, path)
+    meta = {'covered_from': covered_from.isoformat() if covered_from is not None else None}
+    path.with_suffix('.json').write_text(json.dumps(meta))
+
+def store_covers(covered_from, fetch_start):
+    if covered_from is None:
+        return True
+    return fetch_start is not None and fetch_start >= covered_from
+
+def download_history(ticker, interval, fetch_start):
+    if interval in INTRADAY_LIMITS:
+        return download_intraday_history(ticker, interval, fetch_start)
+    if fetch_start is None:
+        return request_history(ticker, interval, period="max")
+    return request_history(ticker, interval, start=fetch_start)
+
+# Fungsi untuk mendapatkan waktu paling awal (UTC) yang masih dilayani Yahoo untuk interval intraday
+def get_intraday_earliest(interval):
+    # Dikurangi satu jam agar request tidak jatuh tepat di batas dan ditolak
+    return pd.Timestamp.utcnow().tz_localize(None) - INTRADAY_LIMITS[interval][1] + timedelta(hours=1)
+
+# Fungsi untuk memecah request intraday menjadi jendela sebesar batas Yahoo,
+# mengambilnya secara paralel, lalu menggabungkannya menjadi satu frame
+def download_intraday_history(ticker, interval, fetch_start):
+    max_window = INTRADAY_LIMITS[interval][0]
+    earliest = get_intraday_earliest(interval)
+    if fetch_start is None:
+        window_start = earliest
+    else:
+        fetch_start = pd.Timestamp(fetch_start)
+        if fetch_start.tzinfo is not None:
+            window_start = fetch_start.tz_convert(None)
+        else:
+            # Tanggal tanpa zona waktu adalah waktu lokal bursa; mundur satu hari agar
+            # selisih zona waktu tidak memotong data (sisanya dipangkas slice_history)
+            window_start = fetch_start - timedelta(days=1)
+        window_start = max(window_start, earliest)
+    window_end = pd.Timestamp.utcnow().tz_localize(None) + timedelta(days=1)
+    
+    bounds = []
+    while window_start < window_end:
+        bounds.append((window_start, min(window_start + max_window, window_end)))
+        window_start += max_window
+    
+    def fetch_window(bound):
+        return request_history(ticker, interval, start=bound[0].tz_localize('UTC'), end=bound[1].tz_localize('UTC'))
+    
+    if len(bounds) == 1:
+        chunks = [fetch_window(bounds[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=min(len(bounds), MAX_FETCH_WORKERS)) as executor:
+            futures = [submit_with_context(executor, fetch_window, bound) for bound in bounds]
+            chunks = [future.result() for future in futures]
+    
+    chunks = [chunk for chunk in chunks if not chunk.empty]
+    if not chunks:
+        return pd.DataFrame()
+    hist = pd.concat(chunks).sort_index()
+    return hist[~hist.index.duplicated(keep='last')]
+
+# Dividen/split baru mengubah harga adjusted seluruh histori, jadi tidak bisa sekadar di-append
+def actions_changed(stored, delta):
+    columns = [col for col in ACTION_COLUMNS if col in delta.columns and col in stored.columns]
+    if not columns:
+        return False
+    previous = stored[columns].reindex(delta.index).fillna(0)
+    return bool((delta[columns] != previous).any().any())
+
+# Fungsi untuk mengambil bar mulai dari bar terakhir yang dipegang (bar itu ikut
+# diambil ulang karena bisa jadi belum final)
+def download_delta(ticker, interval, hist):
+    last_bar = hist.index[-1]
+    delta_start = last_bar if interval in INTRADAY_INTERVALS else last_bar.date()
+    return download_history(ticker, interval, delta_start)
+
+# Fungsi untuk menggabungkan bar baru ke histori; bar yang tumpang tindih ditimpa data baru
+def merge_bars(hist, delta):
+    if delta.empty:
+        return hist
+    merged = pd.concat([hist[hist.index < delta.index[0]], delta])
+    return merged[~merged.index.duplicated(keep='last')]
+
+def update_stored_history(ticker, interval, stored, covered_from):
+    delta = download_delta(ticker, interval, stored)
+    if delta.empty:
+        return stored
+    if actions_changed(stored, delta):
+        hist = download_history(ticker, interval, covered_from)
+    else:
+        hist = merge_bars(stored, delta)
+    save_stored_history(ticker, interval, hist, covered_from)
+    return hist
+
+# Fungsi untuk memotong histori tersimpan sesuai periode yang diminta
+def slice_history(hist, period, start, end):
+    if hist.empty or period == "max":
+        return hist
+    local_index = hist.index.tz_localize(None) if hist.index.tz is not None else hist.index
+    if period in ("1d", "5d"):
+        trading_days = local_index.normalize().unique()
+        return hist[local_index >= trading_days[-int(period[0]):][0]]
+    if period:
+        return hist[local_index >= resolve_fetch_start(period, None)]
+    mask = local_index >= pd.Timestamp(start)
+    if end is not None:
+        mask &= local_index < pd.Timestamp(end)
+    return hist[mask]
+
+# Interval yang bisa dibangun secara lokal dari interval yang lebih halus, beserta
+# kandidat dasarnya (dari yang paling kasar, karena cakupan historinya paling panjang)
+RESAMPLE_BASES = {
+    "1wk": ("1d",),
+    "1mo": ("1d",),
+    "3mo": ("1d",),
+    "2m": ("1m",),
+    "5m": ("1m",),
+    "15m": ("5m", "1m"),
+    "30m": ("15m", "5m", "1m"),
+    "60m": ("30m", "15m", "5m", "1m"),
+    "1h": ("30m", "15m", "5m", "1m"),
+    "90m": ("30m", "15m", "5m", "1m")
+}
+
+# Periode pandas untuk interval harian ke atas (minggu Yahoo dimulai hari Senin)
+RESAMPLE_PERIODS = {"1wk": "W-SUN", "1mo": "M", "3mo": "Q"}
+
+INTERVAL_MINUTES = {"1m": 1, "2m": 2, "5m": 5, "15m": 15, "30m": 30, "60m": 60, "90m": 90, "1h": 60}
+
+# Fungsi untuk menentukan awal bin tiap bar (ns UTC). Bin intraday dihitung dari bar
+# pertama setiap hari bursa, seperti Yahoo (mis. bar 1h bursa AS mulai 09:30).
+def resample_bin_starts(index, interval):
+    local_index = index.tz_localize(None) if index.tz is not None else index
+    if interval in RESAMPLE_PERIODS:
+        starts = local_index.to_period(RESAMPLE_PERIODS[interval]).start_time
+        if index.tz is not None:
+            starts = starts.tz_localize(index.tz, ambiguous='NaT', nonexistent='shift_forward')
+        return starts.asi8
+    step = INTERVAL_MINUTES[interval] * 60 * 10 ** 9
+    ns = index.asi8
+    days = local_index.normalize().asi8
+    day_starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+    session_open = np.repeat(ns[day_starts], np.diff(np.r_[day_starts, len(ns)]))
+    return session_open + (ns - session_open) // step * step
+
+# Fungsi untuk membangun bar interval yang lebih kasar secara tervektorisasi:
+# open pertama, high tertinggi, low terendah, close terakhir, volume dan dividen
+# dijumlah, split dikalikan
+def resample_ohlcv(hist, interval):
+    if hist.empty:
+        return hist
+    bins = resample_bin_starts(hist.index, interval)
+    starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+    ends = np.append(starts[1:], len(hist)) - 1
+    index = pd.DatetimeIndex(pd.to_datetime(bins[starts], utc=True))
+    index = index.tz_convert(hist.index.tz) if hist.index.tz is not None else index.tz_localize(None)
+    index.name = 'Datetime' if interval in INTRADAY_INTERVALS else 'Date'
+    resampled = pd.DataFrame({
+        'Open': hist['Open'].to_numpy()[starts],
+        'High': np.fmax.reduceat(hist['High'].to_numpy(dtype=float), starts),
+        'Low': np.fmin.reduceat(hist['Low'].to_numpy(dtype=float), starts),
+        'Close': hist['Close'].to_numpy()[ends],
+        'Volume': np.add.reduceat(hist['Volume'].to_numpy(), starts)
+    }, index=index)
+    if 'Dividends' in hist:
+        resampled['Dividends'] = np.add.reduceat(hist['Dividends'].to_numpy(dtype=float), starts)
+    if 'Stock Splits' in hist:
+        splits = hist['Stock Splits'].to_numpy(dtype=float)
+        ratio = np.multiply.reduceat(np.where(splits == 0, 1.0, splits), starts)
+        resampled['Stock Splits'] = np.where(ratio == 1.0, 0.0, ratio)
+    return resampled
+
+def read_stored_history(ticker, interval):
+    with instrumentation.stage('store.read', ticker=ticker, interval=interval) as record:
+        stored, covered_from = load_stored_history(ticker, interval)
+        record['rows'] = 0 if stored is None else len(stored)
+    return stored, covered_from
+
+# Fungsi untuk melengkapi histori tersimpan dengan bar terbaru bila rentang yang
+# diminta sampai hari ini
+def refresh_stored_history(ticker, interval, stored, covered_from, period, end):
+    local_last = stored.index[-1].tz_localize(None) if stored.index.tz is not None else stored.index[-1]
+    if not (period or end is None or pd.Timestamp(end) > local_last):
+        return stored
+    if time.monotonic() - _LAST_REFRESH.get((ticker, interval), -np.inf) < STORE_REFRESH_SECONDS:
+        return stored
+    hist = update_stored_history(ticker, interval, stored, covered_from)
+    _LAST_REFRESH[(ticker, interval)] = time.monotonic()
+    return hist
+
+# Cakupan interval dasar untuk resampling. Untuk intraday, batas histori Yahoo
+# berbeda per interval, jadi yang dicek adalah bar pertama yang benar-benar tersimpan.
+def base_covers(stored, covered_from, interval, fetch_start):
+    if interval not in INTRADAY_INTERVALS:
+        return store_covers(covered_from, fetch_start)
+    if fetch_start is None:
+        return False
+    first_bar = stored.index[0].tz_localize(None) if stored.index.tz is not None else stored.index[0]
+    return first_bar.normalize() <= pd.Timestamp(fetch_start).normalize()
+
+# Fungsi untuk membangun interval yang diminta dari interval lebih halus yang sudah
+# tersimpan; None jika tidak ada interval dasar yang mencakup rentang yang diminta
+def derive_history(ticker, interval, period, end, fetch_start):
+    for base in RESAMPLE_BASES.get(interval, ()):
+        with _STORE_LOCKS.setdefault((ticker, base), threading.Lock()):
+            stored, covered_from = read_stored_history(ticker, base)
+            if stored is None or not base_covers(stored, covered_from, base, fetch_start):
+                continue
+            base_hist = refresh_stored_history(ticker, base, stored, covered_from, period, end)
+        with instrumentation.stage('engine.resample', ticker=ticker, base=base, interval=interval, rows=len(base_hist)):
+            return resample_ohlcv(base_hist, interval)
+    return None
+
+# Fungsi untuk mengambil histori harga satu ticker dari penyimpanan lokal,
+# lalu hanya bar yang belum ada yang diunduh. Interval yang lebih kasar dibangun
+# dari interval lebih halus yang sudah tersimpan bila memungkinkan.
+def load_stock_history(ticker, period, interval, start, end):
+    fetch_start = resolve_fetch_start(period, start)
+    hist = derive_history(ticker, interval, period, end, fetch_start)
+    if hist is None:
+        with _STORE_LOCKS.setdefault((ticker, interval), threading.Lock()):
+            stored, covered_from = read_stored_history(ticker, interval)
+            if stored is not None and store_covers(covered_from, fetch_start):
+                hist = refresh_stored_history(ticker, interval, stored, covered_from, period, end)
+            else:
+                hist = download_history(ticker, interval, fetch_start)
+                if not hist.empty:
+                    save_stored_history(ticker, interval, hist, fetch_start)
+                    _LAST_REFRESH[(ticker, interval)] = time.monotonic()
+    return slice_history(hist, period, start, end)
+
+# Batas memori cache histori (MB) dan umur maksimum tiap entri (detik)
+HISTORY_CACHE_MAX_MB = float(os.environ.get("YF_CACHE_MAX_MB", 512))
+HISTORY_CACHE_TTL = 300
+
+_MISSING = object()
+
+# Cache LRU dengan batas ukuran dalam byte. Entri paling lama tidak dipakai
+# dibuang sampai total ukuran kembali di bawah batas.
+class BoundedCache:
+    def __init__(self, max_bytes, ttl=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.resident_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def estimate_size(value):
+        if isinstance(value, pd.DataFrame):
+            return int(value.memory_usage(deep=True).sum())
+        if isinstance(value, pd.Series):
+            return int(value.memory_usage(deep=True))
+        if isinstance(value, np.ndarray):
+            return int(value.nbytes)
+        if isinstance(value, tuple):
+            return sum(BoundedCache.estimate_size(item) for item in value)
+        if isinstance(value, (str, bytes)):
+            return len(value)
+        return 0
+    
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.resident_bytes -= size
+    
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[2] > self.ttl:
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def put(self, key, value, size=None):
+        size = self.estimate_size(value) if size is None else size
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size, time.monotonic())
+            self.resident_bytes += size
+            while self.resident_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+    
+    def get_or_load(self, key, loader):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.put(key, value)
+        return value
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.resident_bytes = 0
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'resident_bytes': self.resident_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_ratio': self.hits / lookups if lookups else 0.0
+            }
+
+# Satu cache histori untuk seluruh sesi/pemanggil dalam proses ini
+HISTORY_CACHE = BoundedCache(int(HISTORY_CACHE_MAX_MB * 1024 * 1024), ttl=HISTORY_CACHE_TTL)
+
+def get_history_cache():
+    return HISTORY_CACHE
+
+# Fungsi untuk memperkecil dtype satu kolom tanpa mengubah nilainya: float64 menjadi
+# float32 bila setiap nilai terwakili persis (mis. harga IDX atau kuotasi mentah
+# Yahoo), volume menjadi integer terkecil yang cukup
+def downcast_lossless(values, integral=False):
+    if values.dtype.kind == 'f' and integral and len(values) and np.isfinite(values).all() and (values == np.round(values)).all():
+        values = values.astype(np.int64)
+    if values.dtype.kind in 'iu' and len(values):
+        narrow = np.result_type(np.min_scalar_type(values.min()), np.min_scalar_type(values.max()))
+        return values.astype(narrow) if narrow.itemsize < values.dtype.itemsize else values
+    if values.dtype == np.float64:
+        with np.errstate(over='ignore'):
+            narrow = values.astype(np.float32)
+        if np.array_equal(narrow, values, equal_nan=True):
+            return narrow
+    return values
+
+# Fungsi untuk membuat versi ringkas histori yang dipakai bersama antar sesi. Tiap
+# kolom di-downcast tanpa kehilangan nilai, dijadikan read-only, dan disimpan
+# sebagai blok sendiri (copy=False) sehingga tidak ada salinan konsolidasi dan
+# perubahan in-place pada frame bersama langsung gagal, bukan diam-diam menular.
+def compact_history(hist):
+    if hist.empty:
+        return hist
+    columns = {}
+    for name in hist.columns:
+        values = downcast_lossless(hist[name].to_numpy(), integral=name == 'Volume')
+        if isinstance(values.base, np.ndarray) and values.base.nbytes > values.nbytes:
+            # View ke blok 2D gabungan akan menahan seluruh blok tetap di memori
+            values = values.copy()
+        values.flags.writeable = False
+        columns[name] = values
+    return pd.DataFrame(columns, index=hist.index, copy=False)
+
+# Frame live yang isinya sama dibagi antar sesi; entri hilang sendiri saat tidak ada
+# sesi yang memegangnya lagi
+_SHARED_FRAMES = weakref.WeakValueDictionary()
+_SHARED_FRAMES_LOCK = threading.Lock()
+
+# Fungsi untuk mengembalikan satu objek frame bersama untuk histori dengan isi yang
+# sama (ticker, interval, rentang, jumlah bar dan bar terakhir)
+def share_history(ticker, interval, hist):
+    if hist.empty:
+        return hist
+    last = hist.iloc[-1]
+    key = (ticker, interval, hist.index[0], hist.index[-1], len(hist), tuple(last.tolist()))
+    with _SHARED_FRAMES_LOCK:
+        shared = _SHARED_FRAMES.get(key)
+        if shared is None:
+            shared = compact_history(hist)
+            _SHARED_FRAMES[key] = shared
+        return shared
+
+# Fungsi untuk mengambil histori harga satu ticker (di-cache per simbol).
+# Frame hasil cache dipakai bersama antar pemanggil dalam bentuk ringkas dan
+# read-only (compact_history), jadi jangan diubah in-place.
+# Request yang sama dari beberapa sesi sekaligus digabung menjadi satu pengambilan.
+def get_stock_history(ticker, period, interval, start, end):
+    key = (ticker, period, interval, start, end)
+    hist = HISTORY_CACHE.get(key, _MISSING)
+    instrumentation.event('engine.cache', ticker=ticker, interval=interval, cache='hit' if hist is not _MISSING else 'miss')
+    if hist is _MISSING:
+        hist = IN_FLIGHT.run(('history',) + key, lambda: load_and_cache_history(key))
+    return hist
+
+def load_and_cache_history(key):
+    with instrumentation.stage('engine.load_history', ticker=key[0], interval=key[2]) as record:
+        hist = compact_history(load_stock_history(*key))
+        record['rows'] = len(hist)
+    HISTORY_CACHE.put(key, hist)
+    return hist
+
+# Fungsi untuk memecah input watchlist menjadi daftar ticker unik
+def parse_tickers(text):
+    tickers = [t.strip().upper() for t in re.split(r'[\s,;]+', text) if t.strip()]
+    return list(dict.fromkeys(tickers))
+
+# Fungsi untuk mengambil banyak ticker secara paralel
+def get_multi_stock_data(tickers, period, interval, start, end, max_workers=MAX_FETCH_WORKERS):
+    results = {}
+    errors = {}
+    workers = max(1, min(max_workers, len(tickers)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            submit_with_context(executor, get_stock_history, ticker, period, interval, start, end): ticker
+            for ticker in tickers
+        }
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                hist = future.result()
+            except Exception as e:
+                errors[ticker] = str(e) or type(e).__name__
+                continue
+            if hist is None or hist.empty:
+                errors[ticker] = "Tidak ada data untuk periode yang dipilih"
+            else:
+                results[ticker] = hist
+    return results, errors
+
+# Fungsi untuk polling live: untuk tiap ticker hanya bar setelah bar terakhir yang
+# dipegang yang diambil, lalu digabung ke frame di memori. Satu request kecil per
+# ticker, paralel dan tetap lewat rate limiter/coalescer seperti request lain.
+# Mengembalikan ({ticker: (frame baru, jumlah bar baru)}, {ticker: pesan error}).
+def poll_new_bars(frames, interval, max_workers=MAX_FETCH_WORKERS):
+    updates = {}
+    errors = {}
+    
+    def poll(ticker, hist):
+        delta = IN_FLIGHT.run(('delta', ticker, interval, hist.index[-1]), lambda: download_delta(ticker, interval, hist))
+        merged = share_history(ticker, interval, merge_bars(hist, delta))
+        return merged, len(merged) - len(hist)
+    
+    workers = max(1, min(max_workers, len(frames)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {submit_with_context(executor, poll, ticker, hist): ticker for ticker, hist in frames.items()}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                updates[ticker] = future.result()
+            except Exception as e:
+                errors[ticker] = str(e) or type(e).__name__
+    return updates, errors
+
+# Fungsi untuk membagi n bar menjadi kelompok berukuran sama; mengembalikan posisi
+# bar pertama dan terakhir tiap kelompok
+def downsample_buckets(n, max_bars):
+    bucket = -(-n // max_bars)
+    starts = np.arange(0, n, bucket)
+    return starts, np.append(starts[1:], n) - 1
+
+# Fungsi untuk menggabungkan bar OHLCV menjadi maksimal max_bars bar (open pertama,
+# high tertinggi, low terendah, close terakhir, volume dijumlah)
+def downsample_ohlc(data, max_bars):
+    n = len(data)
+    if n <= max_bars:
+        return data
+    starts, ends = downsample_buckets(n, max_bars)
+    return pd.DataFrame({
+        'Open': data['Open'].to_numpy()[starts],
+        'High': np.fmax.reduceat(data['High'].to_numpy(dtype=float), starts),
+        'Low': np.fmin.reduceat(data['Low'].to_numpy(dtype=float), starts),
+        'Close': data['Close'].to_numpy()[ends],
+        'Volume': np.add.reduceat(data['Volume'].to_numpy(dtype=float), starts)
+    }, index=data.index[starts])
+
+# Fungsi untuk memilih titik representatif sebuah garis dengan algoritma
+# Largest-Triangle-Three-Buckets (LTTB); mengembalikan posisi titik terpilih
+def lttb_indices(x, y, max_points):
+    n = len(y)
+    if n <= max_points or max_points < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        # Titik acuan bucket berikutnya adalah rata-rata bucket tersebut
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.nanargmax(area)) if not np.isnan(area).all() else start
+        selected[i + 1] = previous
+    return selected
+
+# Fungsi untuk mengurangi titik sebuah series waktu dengan LTTB
+def downsample_line(series, max_points):
+    if len(series) <= max_points:
+        return series
+    positions = lttb_indices(series.index.asi8, series.to_numpy(), max_points)
+    return series.iloc[positions]
+
+# Fungsi untuk mengambil satu halaman tabel histori. Filter tanggal memakai
+# pencarian biner pada index yang sudah urut (end eksklusif) dan pengurutan hanya
+# menghitung posisi baris, sehingga yang disalin hanya baris di halaman tersebut.
+def query_history_page(hist, page, page_size, sort_by=None, ascending=True, start=None, end=None):
+    local_index = hist.index.tz_localize(None) if getattr(hist.index, 'tz', None) is not None else hist.index
+    lower = local_index.searchsorted(pd.Timestamp(start)) if start is not None else 0
+    upper = local_index.searchsorted(pd.Timestamp(end)) if end is not None else len(hist)
+    window = hist.iloc[lower:max(lower, upper)]
+    total_rows = len(window)
+    offset = max(page - 1, 0) * page_size
+    if sort_by is None:
+        positions = np.arange(offset, min(offset + page_size, total_rows))
+        if not ascending:
+            positions = total_rows - 1 - positions
+    else:
+        order = np.argsort(window[sort_by].to_numpy(), kind='stable')
+        if not ascending:
+            order = order[::-1]
+        positions = order[offset:offset + page_size]
+    return window.iloc[positions], total_rows
+
+# Fungsi untuk mendapatkan info perusahaan (request terpisah dari histori harga)
+def fetch_company_info(ticker):
+    provider = get_data_provider()
+    
+    def attempt():
+        if provider.rate_limited:
+            RATE_LIMITER.acquire()
+        with instrumentation.stage('provider.info', provider=provider.name, ticker=ticker):
+            return provider.info(ticker)
+    
+    def fetch():
+        try:
+            return call_with_retry(attempt)
+        except Exception as e:
+            raise FetchError(ticker, e) from e
+    
+    return IN_FLIGHT.run(('info', ticker), fetch)
+
+# Fungsi untuk menghitung statistik return (dalam persen) dari harga penutupan
+def compute_return_stats(hist, periods_per_year=252):
+    daily_return = hist['Close'].astype(float).pct_change() * 100
+    avg_return = daily_return.mean()
+    volatility = daily_return.std()
+    sharpe = (avg_return / volatility) * (periods_per_year ** 0.5) if volatility != 0 else 0
+    return {
+        'daily_return': daily_return,
+        'avg_return': avg_return,
+        'volatility': volatility,
+        'sharpe': sharpe
+    }
+
+# Fungsi untuk meringkas histori satu ticker menjadi satu baris statistik
+def summarize_history(ticker, hist, periods_per_year=252):
+    first_close = hist['Close'].iloc[0]
+    last_close = hist['Close'].iloc[-1]
+    stats = compute_return_stats(hist, periods_per_year)
+    risk = risk_metrics.risk_summary(hist['Close'], periods_per_year).iloc[0]
+    return {
+        'Ticker': ticker,
+        'Start': hist.index[0],
+        'End': hist.index[-1],
+        'Bars': len(hist),
+        'Last Close': last_close,
+        'High': hist['High'].max(),
+        'Low': hist['Low'].min(),
+        'Avg Volume': hist['Volume'].mean(),
+        'Total Return (%)': ((last_close - first_close) / first_close) * 100 if first_close != 0 else 0,
+        'Avg Return (%)': stats['avg_return'],
+        'Volatility (%)': stats['volatility'],
+        'Sharpe Ratio (Ann.)': stats['sharpe'],
+        'Sortino Ratio (Ann.)': risk['Sortino (Ann.)'],
+        'Max Drawdown (%)': risk['Max Drawdown'] * 100,
+        'VaR 95% (%)': risk['VaR'] * 100,
+        'CVaR 95% (%)': risk['CVaR'] * 100
+    }
+
+# Format export yang didukung: (ekstensi file, MIME type)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Feather": ("feather", "application/vnd.apache.arrow.file")
+}
+
+# Jumlah baris per potongan saat menulis CSV agar string CSV penuh tidak pernah dibuat
+CSV_CHUNK_ROWS = 100_000
+
+def write_csv_chunks(hist, fileobj):
+    for start in range(0, max(len(hist), 1), CSV_CHUNK_ROWS):
+        chunk = hist.iloc[start:start + CSV_CHUNK_ROWS]
+        fileobj.write(chunk.to_csv(header=start == 0).encode('utf-8'))
+
+# Fungsi untuk menulis histori ke file object biner dalam format yang dipilih
+def write_export(hist, fileobj, export_format):
+    if export_format == "CSV":
+        write_csv_chunks(hist, fileobj)
+    elif export_format == "CSV (gzip)":
+        with gzip.GzipFile(fileobj=fileobj, mode='wb') as gz_file:
+            write_csv_chunks(hist, gz_file)
+    elif export_format == "Parquet":
+        hist.to_parquet(fileobj)
+    elif export_format == "Feather":
+        # Feather tidak menyimpan index, jadi tanggal dijadikan kolom
+        hist.reset_index().to_feather(fileobj)
+    else:
+        raise ValueError(f"Format export tidak dikenal: {export_format}")
+
+# Fungsi untuk menyimpan histori langsung ke file (streaming, tanpa buffer di memori)
+def export_history(hist, path, export_format="CSV"):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'wb') as fileobj:
+        write_export(hist, fileobj, export_format)
+    return path
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        description="Ekstrak data Yahoo Finance ke file tanpa menjalankan Streamlit."
+    )
+    parser.add_argument('tickers', nargs='*', help="Ticker symbol, mis. BBCA.JK AAPL BTC-USD")
+    parser.add_argument('-f', '--tickers-file', help="File berisi daftar ticker (dipisah koma, spasi, atau baris baru)")
+    parser.add_argument('-p', '--period', default='1y',
+                        choices=["1d", "5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "ytd", "max"],
+                        help="Periode preset (diabaikan jika --start diisi)")
+    parser.add_argument('--start', help="Tanggal mulai (YYYY-MM-DD)")
+    parser.add_argument('--end', help="Tanggal akhir (YYYY-MM-DD), default hari ini")
+    parser.add_argument('-i', '--interval', default='1d',
+                        choices=["1m", "5m", "15m", "30m", "1h", "1d", "1wk", "1mo"])
+    parser.add_argument('-o', '--output-dir', default='output', help="Folder tujuan file hasil ekstraksi")
+    parser.add_argument('--format', default='csv',
+                        choices=[extension for extension, _ in EXPORT_FORMATS.values()],
+                        help="Format file hasil ekstraksi")
+    parser.add_argument('-w', '--workers', type=int, default=MAX_FETCH_WORKERS, help="Jumlah request paralel")
+    parser.add_argument('--provider', choices=["yfinance", "chart", "fixture"],
+                        help="Sumber data (default dari YF_PROVIDER, atau yfinance)")
+    return parser
+
+# Entry point CLI: ambil semua ticker secara paralel, simpan satu file per ticker
+# dan satu file ringkasan. Exit code 1 jika ada ticker yang gagal.
+def main(argv=None):
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    
+    ticker_text = ' '.join(args.tickers)
+    if args.tickers_file:
+        ticker_text += ' ' + Path(args.tickers_file).read_text()
+    tickers = parse_tickers(ticker_text)
+    if not tickers:
+        parser.error("masukkan minimal satu ticker symbol atau --tickers-file")
+    if args.provider:
+        set_data_provider(create_provider(args.provider))
+    
+    if args.start:
+        period = None
+        start = pd.Timestamp(args.start).date()
+        end = pd.Timestamp(args.end).date() if args.end else datetime.now().date()
+    else:
+        period, start, end = args.period, None, None
+    
+    start_time = time.perf_counter()
+    results, errors = get_multi_stock_data(tickers, period, args.interval, start, end, max_workers=args.workers)
+    elapsed = time.perf_counter() - start_time
+    
+    output_dir = Path(args.output_dir)
+    export_format = next(name for name, (extension, _) in EXPORT_FORMATS.items() if extension == args.format)
+    stamp = datetime.now().strftime('%Y%m%d')
+    summary_rows = []
+    for ticker in tickers:
+        if ticker in results:
+            path = export_history(results[ticker], output_dir / f"{safe_file_name(ticker)}_{args.interval}_{stamp}.{args.format}", export_format)
+            hist = results[ticker]
+            summary_rows.append(summarize_history(ticker, hist, risk_metrics.periods_per_year(args.interval, hist.index)))
+            print(f"OK     {ticker}: {len(results[ticker])} bar -> {path}")
+        else:
+            print(f"GAGAL  {ticker}: {errors[ticker]}", file=sys.stderr)
+    
+    if summary_rows:
+        summary_path = output_dir / f"summary_{args.interval}_{stamp}.csv"
+        pd.DataFrame(summary_rows).to_csv(summary_path, index=False)
+        print(f"Ringkasan -> {summary_path}")
+    print(f"{len(results)}/{len(tickers)} ticker berhasil dalam {elapsed:.1f} detik")
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
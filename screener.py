@@ -0,0 +1,112 @@
+# Screener lintas ticker: menghitung metrik Overview/Statistics untuk seluruh
+# universe secara paralel di beberapa core CPU. Yang dikirim ke proses pekerja
+# hanya array NumPy (bukan DataFrame) agar biaya serialisasi tetap kecil.
+from concurrent.futures import ProcessPoolExecutor
+import io
+import multiprocessing
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+import risk_metrics
+
+# Di bawah jumlah ini perhitungan dilakukan di proses utama karena overhead
+# pengiriman data ke proses lain lebih besar daripada perhitungannya
+MIN_PARALLEL_TICKERS = 64
+
+SCREENER_WORKERS = int(os.environ.get("SCREENER_WORKERS", os.cpu_count() or 1))
+
+NANOSECONDS_PER_YEAR = 365 * 24 * 3600 * 10 ** 9
+
+SCREENER_COLUMNS = [
+    'Ticker', 'Bars', 'Last Close', 'Total Return (%)', 'Volatility (Ann. %)', 'Sharpe Ratio (Ann.)',
+    'Dist. 52w High (%)', 'Dist. 52w Low (%)', 'Avg Volume'
+]
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+# Proses pekerja tidak di-fork langsung dari server Streamlit yang multi-thread,
+# melainkan dari proses forkserver yang sudah memuat modul ini
+_CONTEXT = multiprocessing.get_context('forkserver')
+_CONTEXT.set_forkserver_preload([__name__])
+
+# Pool proses dibuat sekali lalu dipakai ulang oleh semua pemanggil
+def get_process_pool():
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(max_workers=SCREENER_WORKERS, mp_context=_CONTEXT)
+        return _POOL
+
+# Fungsi untuk menghitung metrik satu ticker dari array harga
+def screen_arrays(ticker, index_ns, close, high, low, volume, interval):
+    if len(close) == 0:
+        return {'Ticker': ticker, 'Bars': 0}
+    bars_per_year = risk_metrics.periods_per_year(interval, pd.DatetimeIndex(index_ns))
+    returns = np.diff(close) / close[:-1]
+    std = returns.std(ddof=1) if len(returns) > 1 else np.nan
+    last_close = close[-1]
+    # 52 minggu dihitung dari waktu bar terakhir, bukan dari jumlah bar
+    last_year = index_ns >= index_ns[-1] - NANOSECONDS_PER_YEAR
+    high_52w = np.nanmax(high[last_year])
+    low_52w = np.nanmin(low[last_year])
+    return {
+        'Ticker': ticker,
+        'Bars': len(close),
+        'Last Close': last_close,
+        'Total Return (%)': (last_close / close[0] - 1) * 100 if close[0] != 0 else np.nan,
+        'Volatility (Ann. %)': std * np.sqrt(bars_per_year) * 100,
+        'Sharpe Ratio (Ann.)': returns.mean() / std * np.sqrt(bars_per_year) if std else np.nan,
+        'Dist. 52w High (%)': (last_close / high_52w - 1) * 100,
+        'Dist. 52w Low (%)': (last_close / low_52w - 1) * 100,
+        'Avg Volume': np.nanmean(volume)
+    }
+
+def _screen_batch(batch):
+    return [screen_arrays(*item) for item in batch]
+
+def _to_arrays(ticker, hist, interval):
+    close = hist['Close'].to_numpy(dtype=float)
+    valid = ~np.isnan(close)
+    return (
+        ticker,
+        hist.index.asi8[valid],
+        close[valid],
+        hist['High'].to_numpy(dtype=float)[valid],
+        hist['Low'].to_numpy(dtype=float)[valid],
+        hist['Volume'].to_numpy(dtype=float)[valid],
+        interval
+    )
+
+# Fungsi untuk menyaring seluruh universe; histories = {ticker: DataFrame OHLCV}.
+# Ticker dibagi menjadi beberapa batch per core agar jumlah pengiriman antar proses sedikit.
+def screen_universe(histories, interval, max_workers=None):
+    items = [_to_arrays(ticker, hist, interval) for ticker, hist in histories.items() if not hist.empty]
+    if not items:
+        return pd.DataFrame()
+
+    workers = min(max_workers or SCREENER_WORKERS, len(items))
+    if len(items) < MIN_PARALLEL_TICKERS or workers <= 1:
+        rows = _screen_batch(items)
+    else:
+        batch_size = -(-len(items) // (workers * 4))
+        batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+        rows = [row for batch_rows in get_process_pool().map(_screen_batch, batches) for row in batch_rows]
+
+    ranking = pd.DataFrame(rows, columns=SCREENER_COLUMNS).sort_values('Sharpe Ratio (Ann.)', ascending=False, na_position='last')
+    ranking.insert(0, 'Rank', np.arange(1, len(ranking) + 1))
+    return ranking.reset_index(drop=True)
+
+# Fungsi untuk membaca daftar ticker dari file upload (CSV dengan kolom
+# ticker/symbol, atau teks biasa yang dipisah koma/spasi/baris baru)
+def parse_universe_file(name, content):
+    text = content.decode('utf-8', errors='ignore')
+    if name.lower().endswith('.csv'):
+        frame = pd.read_csv(io.StringIO(text))
+        columns = [col for col in frame.columns if str(col).strip().lower() in ('ticker', 'symbol', 'kode', 'code')]
+        column = columns[0] if columns else frame.columns[0]
+        return ' '.join(frame[column].dropna().astype(str))
+    return text
@@ -0,0 +1,96 @@
+import json
+
+import pandas as pd
+import pytest
+
+import data_providers
+from data_providers import (
+    ChartHTTPProvider, FixtureProvider, YFinanceProvider, create_provider, get_data_provider, set_data_provider
+)
+from scraper_engine import compute_return_stats, request_history
+
+def test_synthetic_intraday_bars_align_across_overlapping_requests():
+    provider = FixtureProvider()
+    end = pd.Timestamp('2024-03-08 20:00:00.123456', tz='UTC')
+    
+    wide = provider.history('AAPL', '5m', start=end - pd.Timedelta(days=4, microseconds=544571), end=end)
+    narrow = provider.history('AAPL', '5m', start=end - pd.Timedelta(days=2, seconds=38), end=end)
+    
+    assert (wide.index.second == 0).all() and (wide.index.microsecond == 0).all()
+    shared = wide.index.intersection(narrow.index)
+    assert len(shared) == len(narrow) > 0
+    pd.testing.assert_frame_equal(wide.loc[shared], narrow.loc[shared])
+
+
+@pytest.fixture
+def restore_provider():
+    previous = get_data_provider()
+    yield
+    set_data_provider(previous)
+
+def _recording(periods=60):
+    index = pd.date_range('2020-01-01', periods=periods, freq='B', tz='UTC', name='Date')
+    hist = data_providers.synthetic_ohlcv('REC', index)
+    hist['Close'] = range(1, periods + 1)
+    return hist
+
+def test_create_provider_by_name_and_environment(monkeypatch):
+    assert isinstance(create_provider('yfinance'), YFinanceProvider)
+    assert isinstance(create_provider('FIXTURE'), FixtureProvider)
+    monkeypatch.setenv('YF_PROVIDER', 'fixture')
+    assert isinstance(create_provider(), FixtureProvider)
+    
+    monkeypatch.setattr(data_providers, 'YF_CHART_URL', None)
+    with pytest.raises(ValueError):
+        create_provider('chart')
+    monkeypatch.setattr(data_providers, 'YF_CHART_URL', 'http://127.0.0.1:1')
+    provider = create_provider('chart')
+    assert isinstance(provider, ChartHTTPProvider) and provider.base_url == 'http://127.0.0.1:1'
+    with pytest.raises(ValueError):
+        create_provider('unknown')
+
+def test_set_data_provider_routes_requests(restore_provider):
+    provider = FixtureProvider()
+    set_data_provider(provider)
+    assert get_data_provider() is provider
+    
+    hist = request_history('AAPL', '1d', period='6mo')
+    stats = compute_return_stats(hist)
+    
+    assert len(hist) > 100
+    assert list(hist.columns[:5]) == ['Open', 'High', 'Low', 'Close', 'Volume']
+    assert stats is not None
+
+def test_recorded_replay_anchors_period_on_last_recorded_bar(tmp_path):
+    recorded = _recording()
+    recorded.to_parquet(tmp_path / 'REC_1d.parquet')
+    (tmp_path / 'REC_info.json').write_text(json.dumps({'symbol': 'REC', 'longName': 'Recorded Inc'}))
+    provider = FixtureProvider(tmp_path, synthetic=False)
+    
+    month = provider.history('REC', '1d', period='1mo')
+    assert month.index[-1] == recorded.index[-1]
+    assert month.index[0] >= recorded.index[-1] - pd.DateOffset(months=1)
+    pd.testing.assert_frame_equal(month, recorded.loc[month.index], check_freq=False)
+    
+    window = provider.history('REC', '1d', start='2020-01-10', end='2020-01-17')
+    assert list(window['Close']) == [8, 9, 10, 11, 12]
+    pd.testing.assert_frame_equal(provider.history('REC', '1d', period='max'), recorded, check_freq=False)
+    
+    assert provider.info('REC')['longName'] == 'Recorded Inc'
+    assert provider.history('MISSING', '1d', period='1mo').empty
+
+def test_synthetic_replay_is_deterministic_and_anchored_on_now():
+    provider = FixtureProvider()
+    
+    first = provider.history('MSFT', '1d', period='3mo')
+    second = FixtureProvider().history('MSFT', '1d', period='3mo')
+    other = provider.history('NVDA', '1d', period='3mo')
+    
+    pd.testing.assert_frame_equal(first, second)
+    assert not first['Close'].equals(other['Close'])
+    now = pd.Timestamp.now(tz='UTC')
+    assert first.index[-1] <= now and first.index[-1] >= now.normalize() - pd.Timedelta(days=4)
+    assert first.index[0] >= (now - pd.DateOffset(months=3)).normalize()
+    assert provider.history('MSFT', '1d', period='max').index[0] == data_providers.FIXTURE_EPOCH
+    assert (first['High'] >= first[['Open', 'Close']].max(axis=1)).all()
+    assert (first['Low'] <= first[['Open', 'Close']].min(axis=1)).all()
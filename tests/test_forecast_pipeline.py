@@ -0,0 +1,43 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+from pmdarima.arima import ARIMA
+
+from forecast_pipeline import fit_models, future_forecast, split_series
+
+warnings.filterwarnings('ignore')
+
+def _fit(train_data):
+    return ARIMA(order=(1, 1, 0), suppress_warnings=True).fit(train_data)
+
+def _series(index):
+    rng = np.random.default_rng(0)
+    return pd.Series(10 + np.cumsum(rng.normal(size=len(index))), index=index, name='Nilai')
+
+def test_fit_models_with_irregular_dates():
+    rng = np.random.default_rng(1)
+    offsets = np.sort(rng.choice(400, 120, replace=False))
+    data = _series(pd.DatetimeIndex(pd.Timestamp('2020-01-01') + pd.to_timedelta(offsets, unit='D')))
+    train_data, test_data = split_series(data, 80)
+    
+    fitted = fit_models(_fit(train_data), test_data)
+    
+    assert fitted['predictions_test'].index.equals(test_data.index)
+    assert not fitted['predictions_test'].isna().any()
+    assert all(np.isfinite(value) for value in fitted['metrics'].values())
+
+def test_future_forecast_confidence_interval():
+    data = _series(pd.date_range('2000-01-01', periods=120, freq='MS'))
+    train_data, test_data = split_series(data, 80)
+    fitted = fit_models(_fit(train_data), test_data)
+    
+    future_dates, forecast, forecast_ci = future_forecast(fitted['model_full_fit'], data.index, 12, 'Nilai')
+    
+    assert len(future_dates) == 12 and future_dates[0] > data.index[-1]
+    assert forecast.index.equals(future_dates) and forecast_ci.index.equals(future_dates)
+    assert not forecast.isna().any()
+    assert not forecast_ci.isna().any().any()
+    assert (forecast_ci.iloc[:, 0] <= forecast).all() and (forecast <= forecast_ci.iloc[:, 1]).all()
+    expected = fitted['model_full_fit'].get_forecast(steps=12).conf_int()
+    np.testing.assert_allclose(forecast_ci.to_numpy(), np.asarray(expected))
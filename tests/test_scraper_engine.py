@@ -0,0 +1,233 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+from yfinance.exceptions import YFChartError, YFInvalidPeriodError, YFPricesMissingError, YFTzMissingError
+
+import scraper_engine
+from data_providers import ChartHTTPError, ChartHTTPProvider, FixtureProvider, get_data_provider, set_data_provider
+from scraper_engine import (
+    FetchError, actions_changed, call_with_retry, is_retryable, load_stored_history, poll_new_bars, request_history,
+    update_stored_history
+)
+
+@pytest.fixture
+def restore_provider():
+    previous = get_data_provider()
+    yield
+    set_data_provider(previous)
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(scraper_engine.time, 'sleep', delays.append)
+    monkeypatch.setattr(scraper_engine.random, 'uniform', lambda low, high: high)
+    return delays
+
+def _failing(errors, result='ok'):
+    calls = []
+    
+    def fn():
+        calls.append(len(calls))
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+    
+    return fn, calls
+
+def test_is_retryable_only_treats_explicit_not_found_as_permanent():
+    assert not is_retryable(YFChartError('GONE', 'No data found, symbol may be delisted'))
+    assert not is_retryable(ChartHTTPError(404, 'Not Found'))
+    assert not is_retryable(ChartHTTPError(400, 'Bad Request'))
+    
+    assert is_retryable(YFTzMissingError('AAPL'))
+    assert is_retryable(YFPricesMissingError('AAPL', '(period=1mo)'))
+    assert is_retryable(YFInvalidPeriodError('AAPL', '1mo', ['1d', '5d']))
+    assert is_retryable(ChartHTTPError(429, 'Too Many Requests'))
+    assert is_retryable(ChartHTTPError(503, 'Service Unavailable'))
+    assert is_retryable(ConnectionError('reset'))
+
+def test_call_with_retry_backs_off_exponentially(sleeps):
+    fn, calls = _failing([ConnectionError('reset'), YFTzMissingError('AAPL'), ChartHTTPError(429, 'slow down')])
+    
+    assert call_with_retry(fn, retries=3) == 'ok'
+    assert len(calls) == 4
+    assert sleeps == [0.5, 1.0, 2.0]
+
+def test_call_with_retry_caps_delay_and_reraises_when_exhausted(sleeps):
+    fn, calls = _failing([ConnectionError(str(n)) for n in range(7)])
+    
+    with pytest.raises(ConnectionError, match='6'):
+        call_with_retry(fn, retries=6)
+    assert len(calls) == 7
+    assert sleeps == [0.5, 1.0, 2.0, 4.0, 8.0, 8.0]
+
+def test_call_with_retry_stops_on_permanent_error(sleeps):
+    fn, calls = _failing([YFChartError('GONE', 'No data found, symbol may be delisted')])
+    
+    with pytest.raises(YFChartError):
+        call_with_retry(fn, retries=3)
+    assert len(calls) == 1 and sleeps == []
+
+# Stub endpoint chart: setiap request mengambil respons berikutnya dari antrean
+class _ChartStub(BaseHTTPRequestHandler):
+    def do_GET(self):
+        status, payload = self.server.responses.pop(0) if self.server.responses else (200, self.server.chart)
+        self.server.paths.append(self.path)
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+def _chart_payload():
+    timestamps = [int(pd.Timestamp(day, tz='America/New_York').timestamp()) for day in ['2024-03-04', '2024-03-05', '2024-03-06']]
+    return {'chart': {'error': None, 'result': [{
+        'meta': {'exchangeTimezoneName': 'America/New_York'},
+        'timestamp': timestamps,
+        'indicators': {
+            'quote': [{
+                'open': [10.0, 11.0, 12.0],
+                'high': [10.5, 11.5, 12.5],
+                'low': [9.5, 10.5, 11.5],
+                'close': [10.0, 11.0, None],
+                'volume': [100, 200, 300]
+            }],
+            'adjclose': [{'adjclose': [5.0, 5.5, None]}]
+        },
+        'events': {'dividends': {str(timestamps[1]): {'date': timestamps[1], 'amount': 0.25}}}
+    }]}}
+
+@pytest.fixture
+def chart_server(restore_provider):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _ChartStub)
+    server.responses = []
+    server.paths = []
+    server.chart = _chart_payload()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    set_data_provider(ChartHTTPProvider(f'http://127.0.0.1:{server.server_port}'))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_chart_provider_parses_stub_response(chart_server, sleeps):
+    hist = request_history('ACME', '1d', period='5d')
+    
+    assert chart_server.paths[0].startswith('/v8/finance/chart/ACME?')
+    assert 'range=5d' in chart_server.paths[0]
+    assert list(hist.index.strftime('%Y-%m-%d')) == ['2024-03-04', '2024-03-05']
+    assert list(hist['Close']) == [5.0, 5.5]
+    assert list(hist['Open']) == [5.0, 5.5]
+    assert list(hist['Volume']) == [100, 200]
+    assert list(hist['Dividends']) == [0.0, 0.25]
+    assert sleeps == []
+
+def test_chart_provider_retries_throttling_and_server_errors(chart_server, sleeps):
+    chart_server.responses = [(429, {}), (503, {'chart': {'error': {'description': 'Service Unavailable'}}})]
+    
+    hist = request_history('ACME', '1d', period='5d')
+    
+    assert len(chart_server.paths) == 3
+    assert sleeps == [0.5, 1.0]
+    assert len(hist) == 2
+
+def test_chart_provider_not_found_is_permanent(chart_server, sleeps):
+    chart_server.responses = [(404, {'chart': {'result': None, 'error': {'code': 'Not Found', 'description': 'No data found, symbol may be delisted'}}})]
+    
+    with pytest.raises(FetchError) as raised:
+        request_history('GONE', '1d', period='5d')
+    
+    assert raised.value.ticker == 'GONE'
+    assert isinstance(raised.value.cause, ChartHTTPError) and raised.value.cause.status_code == 404
+    assert len(chart_server.paths) == 1 and sleeps == []
+
+# Histori "upstream" yang diputar ulang FixtureProvider dari rekaman parquet
+def _upstream(tmp_path, monkeypatch, hist, ticker='ACME', interval='1d'):
+    hist.to_parquet(tmp_path / f'{ticker}_{interval}.parquet')
+    set_data_provider(FixtureProvider(tmp_path, synthetic=False))
+    monkeypatch.setattr(scraper_engine, 'DATA_STORE_DIR', tmp_path / 'store')
+    return hist
+
+def _bars(periods=30, freq='B', start='2024-01-02'):
+    # Bar intraday harus berada dalam jendela yang masih dilayani Yahoo
+    if freq != 'B':
+        start = pd.Timestamp.now(tz='UTC').floor('D') - pd.Timedelta(days=2)
+    index = pd.date_range(start, periods=periods, freq=freq, tz='UTC', name='Date' if freq == 'B' else 'Datetime')
+    close = pd.Series(range(100, 100 + periods), index=index, dtype=float)
+    return pd.DataFrame({
+        'Open': close - 0.5,
+        'High': close + 1.0,
+        'Low': close - 1.0,
+        'Close': close,
+        'Volume': pd.Series(1000, index=index, dtype='int64'),
+        'Dividends': 0.0,
+        'Stock Splits': 0.0
+    })
+
+@pytest.mark.parametrize('interval, freq', [('1d', 'B'), ('5m', '5min')])
+def test_poll_new_bars_replaces_open_last_bar(tmp_path, monkeypatch, restore_provider, interval, freq):
+    upstream = _upstream(tmp_path, monkeypatch, _bars(freq=freq), interval=interval)
+    # Frame di memori berhenti 3 bar lebih awal, dan bar terakhirnya masih belum final
+    held = upstream.iloc[:-3].copy()
+    held.iloc[-1, held.columns.get_loc('Close')] = 1.0
+    held.iloc[-1, held.columns.get_loc('Volume')] = 7
+    
+    updates, errors = poll_new_bars({'ACME': held}, interval)
+    
+    merged, new_count = updates['ACME']
+    assert errors == {}
+    assert new_count == 3
+    assert merged.index.is_unique
+    # Frame hasil polling dipakai bersama dalam bentuk ringkas (float32)
+    pd.testing.assert_frame_equal(merged, upstream, check_freq=False, check_dtype=False)
+
+def test_poll_new_bars_without_new_data_keeps_frame(tmp_path, monkeypatch, restore_provider):
+    upstream = _upstream(tmp_path, monkeypatch, _bars())
+    
+    updates, errors = poll_new_bars({'ACME': upstream}, '1d')
+    
+    merged, new_count = updates['ACME']
+    assert errors == {} and new_count == 0
+    pd.testing.assert_frame_equal(merged, upstream, check_freq=False, check_dtype=False)
+
+def test_update_stored_history_appends_delta(tmp_path, monkeypatch, restore_provider):
+    upstream = _upstream(tmp_path, monkeypatch, _bars())
+    stored = upstream.iloc[:-5]
+    fetch_starts = []
+    download_history = scraper_engine.download_history
+    monkeypatch.setattr(scraper_engine, 'download_history', lambda *args: fetch_starts.append(args[2]) or download_history(*args))
+    
+    hist = update_stored_history('ACME', '1d', stored, upstream.index[0])
+    
+    assert fetch_starts == [stored.index[-1].date()]
+    pd.testing.assert_frame_equal(hist, upstream, check_freq=False)
+    assert load_stored_history('ACME', '1d')[0].equals(hist)
+
+def test_update_stored_history_reloads_after_dividend(tmp_path, monkeypatch, restore_provider):
+    stored = _bars()
+    # Dividen pada bar baru membuat Yahoo menyesuaikan ulang harga seluruh histori
+    upstream = _bars(periods=32)
+    upstream[['Open', 'High', 'Low', 'Close']] *= 0.98
+    upstream.iloc[-1, upstream.columns.get_loc('Dividends')] = 2.0
+    _upstream(tmp_path, monkeypatch, upstream)
+    covered_from = stored.index[0]
+    fetch_starts = []
+    download_history = scraper_engine.download_history
+    monkeypatch.setattr(scraper_engine, 'download_history', lambda *args: fetch_starts.append(args[2]) or download_history(*args))
+    
+    hist = update_stored_history('ACME', '1d', stored, covered_from)
+    
+    assert actions_changed(stored, upstream.iloc[-3:])
+    assert not actions_changed(stored, upstream.iloc[:-1])
+    assert fetch_starts == [stored.index[-1].date(), covered_from]
+    pd.testing.assert_frame_equal(hist, upstream, check_freq=False)
+    reloaded, reloaded_from = load_stored_history('ACME', '1d')
+    assert reloaded_from == covered_from
+    pd.testing.assert_frame_equal(reloaded, upstream, check_freq=False)
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+import screener
+
+def _histories(count, bars=300):
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2023-01-02', periods=bars, freq='B', tz='UTC')
+    histories = {}
+    for number in range(count):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+        histories[f'T{number:03d}'] = pd.DataFrame({
+            'Open': close,
+            'High': close * 1.01,
+            'Low': close * 0.99,
+            'Close': close,
+            'Volume': rng.integers(1_000, 10_000, bars)
+        }, index=index)
+    return histories
+
+def test_parallel_screen_matches_inline():
+    histories = _histories(screener.MIN_PARALLEL_TICKERS + 8)
+    
+    parallel = screener.screen_universe(histories, '1d', max_workers=2)
+    inline = screener.screen_universe(histories, '1d', max_workers=1)
+    
+    assert len(parallel) == len(histories)
+    pd.testing.assert_frame_equal(parallel, inline)
@@ -1,11 +1,58 @@
 import streamlit as st
-import yfinance as yf
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from pandas.io.formats.style import Styler
+import numpy as np
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+import io
+import json
+import os
 import time
 
+from figure_cache import cached_figure
+from indicators import INDICATORS, compute_indicator
+from instrumentation import current_trace, finish_trace, start_trace, submit_with_context
+import instrumentation
+from charts import (
+    create_candlestick_chart,
+    create_correlation_heatmap,
+    create_price_line_chart,
+    create_returns_histogram,
+    create_risk_chart,
+    create_rolling_correlation_chart,
+    update_candlestick_chart
+)
+from scraper_engine import (
+    EXPORT_FORMATS,
+    INTRADAY_LIMITS,
+    compute_return_stats,
+    fetch_company_info,
+    get_history_cache,
+    get_intraday_earliest,
+    get_multi_stock_data,
+    get_stock_history,
+    parse_tickers,
+    poll_new_bars,
+    query_history_page,
+    resolve_fetch_start,
+    write_export
+)
+from risk_metrics import (
+    drawdown,
+    periods_per_year,
+    risk_summary,
+    rolling_conditional_value_at_risk,
+    rolling_correlation,
+    rolling_sharpe,
+    rolling_sortino,
+    rolling_value_at_risk,
+    rolling_volatility,
+    simple_returns
+)
+from portfolio import PortfolioStats, portfolio_volatility
+from screener import parse_universe_file, screen_universe
+
 # Konfigurasi halaman
 st.set_page_config(
     page_title="📈 Yahoo Finance Data Scraper",
@@ -63,12 +110,38 @@ st.markdown("### Ekstrak data instrumen investasi dari Yahoo Finance")
 with st.sidebar:
     st.markdown("## ⚙️ Pengaturan")
     
+    # Mode scraping
+    scrape_mode = st.radio(
+        "Mode",
+        ["Single Ticker", "Watchlist", "Screener"],
+        horizontal=True,
+        help="Watchlist mengambil banyak ticker sekaligus secara paralel; Screener memeringkat seluruh universe ticker"
+    )
+    
     # Input ticker
-    ticker_input = st.text_input(
-        "Masukkan Ticker Symbol",
-        value="BBCA.JK",
-        help="Contoh: AAPL (Apple), BBCA.JK (BCA), BTC-USD (Bitcoin), EURUSD=X (EUR/USD)"
-    ).upper()
+    if scrape_mode == "Single Ticker":
+        ticker_input = st.text_input(
+            "Masukkan Ticker Symbol",
+            value="BBCA.JK",
+            help="Contoh: AAPL (Apple), BBCA.JK (BCA), BTC-USD (Bitcoin), EURUSD=X (EUR/USD)"
+        ).upper()
+        watchlist_input = ""
+    else:
+        watchlist_input = st.text_area(
+            "Daftar Ticker",
+            value="BBCA.JK, BBRI.JK, BMRI.JK, TLKM.JK, ASII.JK",
+            height=150,
+            help="Pisahkan ticker dengan koma, spasi, atau baris baru"
+        )
+        ticker_input = ""
+        if scrape_mode == "Screener":
+            universe_file = st.file_uploader(
+                "Atau upload universe (CSV/TXT)",
+                type=['csv', 'txt'],
+                help="CSV dengan kolom Ticker/Symbol (atau kolom pertama), atau TXT berisi daftar ticker"
+            )
+            if universe_file is not None:
+                watchlist_input += "\n" + parse_universe_file(universe_file.name, universe_file.getvalue())
     
     # Pilihan periode
     st.markdown("### 📅 Periode Data")
@@ -105,94 +178,539 @@ with st.sidebar:
         "Interval Data",
         ["1m", "5m", "15m", "30m", "1h", "1d", "1wk", "1mo"],
         index=5,
-        help="Interval 1m-1h hanya untuk periode ≤30 hari"
+        help="Yahoo hanya menyediakan 1m untuk 30 hari terakhir, 5m-30m untuk 60 hari, dan 1h untuk 730 hari. "
+             "Request intraday yang panjang otomatis dipecah dan digabungkan."
+    )
+    
+    # Pengaturan tampilan chart
+    st.markdown("### 🖥️ Tampilan")
+    fast_render = st.toggle(
+        "Downsampling Chart",
+        value=True,
+        help="Kurangi jumlah titik chart sesuai resolusi layar agar data besar tetap ringan. Zoom untuk melihat detail."
+    )
+    debug_panel = st.toggle(
+        "Debug Panel",
+        value=os.environ.get("YF_DEBUG_PANEL") == "1",
+        help="Tampilkan waktu tiap tahap, cache hit/miss, jumlah baris, dan ukuran payload chart/tabel untuk request ini"
+    )
+    
+    # Mode live: polling bar terbaru secara berkala
+    st.markdown("### 🔴 Live")
+    live_mode = st.toggle(
+        "Live Auto-Refresh",
+        value=False,
+        help="Ambil hanya bar yang lebih baru dari bar terakhir secara berkala dan perbarui chart live tanpa memuat ulang seluruh halaman"
+    )
+    live_seconds = st.select_slider(
+        "Interval Polling (detik)",
+        options=[5, 10, 15, 30, 60, 120, 300],
+        value=30,
+        disabled=not live_mode
     )
     
     # Tombol scrape
     scrape_button = st.button("🔍 Ekstrak Data", type="primary", use_container_width=True)
 
 
-# Fungsi untuk mendapatkan data
-@st.cache_data(ttl=300)
+# Fungsi untuk mendapatkan data; mengembalikan (histori, pesan error)
 def get_stock_data(ticker, period, interval, start, end):
     try:
-        stock = yf.Ticker(ticker)
-        if period:
-            hist = stock.history(period=period, interval=interval)
-        else:
-            hist = stock.history(start=start, end=end, interval=interval)
-        info = stock.info
-        return hist, info
+        return get_stock_history(ticker, period, interval, start, end), None
     except Exception as e:
-        return None, None
-
-# Fungsi untuk membuat candlestick chart
-def create_candlestick_chart(data, ticker):
-    fig = make_subplots(
-        rows=2, cols=1,
-        shared_xaxes=True,
-        vertical_spacing=0.03,
-        row_heights=[0.7, 0.3],
-        subplot_titles=(f'{ticker} Price Chart', 'Volume')
-    )
+        return None, str(e) or type(e).__name__
+
+# Fungsi untuk mendapatkan info perusahaan. Data fundamental jarang berubah,
+# jadi di-cache lebih lama dan dipisah dari request histori harga.
+@st.cache_data(ttl=86400)
+def get_company_info(ticker):
+    return fetch_company_info(ticker)
+
+# Fungsi untuk memulai pengambilan info perusahaan di background
+def start_company_info_fetch(ticker):
+    executor = ThreadPoolExecutor(max_workers=1, initializer=add_script_run_ctx, initargs=(None, get_script_run_ctx()))
+    future = submit_with_context(executor, get_company_info, ticker)
+    executor.shutdown(wait=False)
+    return future
+
+# Fungsi untuk menampilkan tombol download yang file-nya baru dibuat saat diminta,
+# bukan di setiap rerun. File yang sudah dibuat disimpan di session sampai data
+# atau format berubah.
+def render_export_controls(data, file_stem, key):
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        export_format = st.selectbox("Format Export", list(EXPORT_FORMATS), key=f"{key}_format")
+    with col2:
+        st.markdown("<div style='height: 28px'></div>", unsafe_allow_html=True)
+        prepare = st.button("📦 Siapkan File", key=f"{key}_prepare", use_container_width=True)
     
-    # Candlestick
-    fig.add_trace(
-        go.Candlestick(
-            x=data.index,
-            open=data['Open'],
-            high=data['High'],
-            low=data['Low'],
-            close=data['Close'],
-            name='Price',
-            increasing_line_color='#26a69a',
-            decreasing_line_color='#ef5350'
-        ),
-        row=1, col=1
-    )
+    export_id = (file_stem, export_format, len(data), data.index[-1] if len(data) else None)
+    if prepare:
+        with st.spinner("🔄 Menyiapkan file..."):
+            buffer = io.BytesIO()
+            write_export(data, buffer, export_format)
+            st.session_state[f"{key}_payload"] = (export_id, buffer.getvalue())
+    
+    prepared = st.session_state.get(f"{key}_payload")
+    if prepared and prepared[0] == export_id:
+        extension, mime = EXPORT_FORMATS[export_format]
+        st.download_button(
+            label=f"📥 Download Data as {export_format}",
+            data=prepared[1],
+            file_name=f"{file_stem}.{extension}",
+            mime=mime
+        )
+
+# Fungsi untuk input parameter satu indikator; mengembalikan tuple parameter
+def indicator_param_inputs(name):
+    defaults = INDICATORS[name][1]
+    if name in ('SMA', 'EMA'):
+        return (st.number_input(f"Periode {name}", 2, 500, defaults[0], key=f"ind_{name}_period"),)
+    if name == 'Bollinger Bands':
+        return (
+            st.number_input("Periode BB", 2, 500, defaults[0], key="ind_bb_period"),
+            st.number_input("Lebar BB (σ)", 0.5, 5.0, defaults[1], step=0.5, key="ind_bb_width")
+        )
+    if name == 'RSI':
+        return (st.number_input("Periode RSI", 2, 100, defaults[0], key="ind_rsi_period"),)
+    if name == 'MACD':
+        return (
+            st.number_input("MACD Fast", 2, 100, defaults[0], key="ind_macd_fast"),
+            st.number_input("MACD Slow", 3, 200, defaults[1], key="ind_macd_slow"),
+            st.number_input("MACD Signal", 2, 100, defaults[2], key="ind_macd_signal")
+        )
+    st.caption(f"{name}: per sesi untuk intraday, anchored sejak awal data untuk harian")
+    return defaults
+
+# Fungsi untuk menampilkan chart Plotly sambil mencatat waktu render dan ukuran payload
+def show_chart(fig, name):
+    fields = {'bytes': instrumentation.figure_bytes(fig)} if instrumentation.payload_enabled() else {}
+    with instrumentation.stage(f'render.{name}', **fields):
+        st.plotly_chart(fig, use_container_width=True)
+
+# Fungsi untuk menampilkan figure lewat cache figure: build() hanya dipanggil bila data
+# (key_parts: frame + opsi chart) belum pernah dirender, termasuk oleh sesi lain
+def show_cached_chart(name, key_parts, build, **fields):
+    with instrumentation.stage(f'figure.{name}', **fields) as record:
+        fig, cached = cached_figure(name, key_parts, build)
+        record['cache'] = 'hit' if cached else 'miss'
+    show_chart(fig, name)
+
+# Fungsi untuk menampilkan tabel (DataFrame atau Styler) sambil mencatat waktu render,
+# jumlah baris, dan ukuran payload
+def show_table(data, name, **kwargs):
+    frame = data.data if isinstance(data, Styler) else data
+    fields = {'rows': len(frame)}
+    if instrumentation.payload_enabled():
+        fields['bytes'] = instrumentation.frame_bytes(frame)
+    with instrumentation.stage(f'render.{name}', **fields):
+        st.dataframe(data, **kwargs)
+
+# Fungsi untuk menampilkan ringkasan instrumentasi request
+def render_debug_panel(trace):
+    trace_dict = trace.to_dict()
+    stages = pd.DataFrame(trace_dict['stages'])
+    for column in ('stage', 'ms', 'rows', 'bytes', 'cache'):
+        if column not in stages:
+            stages[column] = np.nan
+    with st.expander(f"🐞 Debug Panel · request {trace.trace_id}", expanded=True):
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Total Waktu", f"{trace.total_ms:,.0f} ms")
+        with col2:
+            st.metric("Cache Hit / Miss", f"{(stages['cache'] == 'hit').sum()} / {(stages['cache'] == 'miss').sum()}")
+        with col3:
+            st.metric("Request Provider", f"{stages['stage'].str.startswith('provider.').sum()}")
+        with col4:
+            st.metric("Payload Chart/Tabel", f"{stages['bytes'].sum() / 1024:,.1f} KB")
+        
+        # Ringkasan per tahap untuk mencari hot spot, lalu rincian urut waktu
+        per_stage = stages.groupby('stage').agg(
+            calls=('stage', 'size'),
+            total_ms=('ms', 'sum'),
+            rows=('rows', 'sum'),
+            bytes=('bytes', 'sum')
+        ).sort_values('total_ms', ascending=False)
+        st.dataframe(per_stage, use_container_width=True)
+        st.dataframe(stages, use_container_width=True, hide_index=True)
+        st.download_button(
+            label="📥 Download Trace (JSON)",
+            data=json.dumps(trace_dict, indent=2, default=str),
+            file_name=f"trace_{trace.trace_id}.json",
+            mime="application/json"
+        )
+
+# Jumlah bar terakhir yang ditampilkan di chart live
+LIVE_WINDOW_BARS = 300
+
+# Fungsi untuk memperbarui frame live di session dengan bar terbaru. Frame diisi dari
+# histori hasil scrape saat pertama kali, lalu hanya ditambah bar baru setiap polling.
+# Mengembalikan ({ticker: jumlah bar baru}, {ticker: pesan error}).
+def refresh_live_frames(initial_frames, interval):
+    live_frames = st.session_state.setdefault('live_frames', {})
+    to_poll = {}
+    for ticker, hist in initial_frames.items():
+        if (ticker, interval) in live_frames:
+            to_poll[ticker] = live_frames[(ticker, interval)]
+        else:
+            live_frames[(ticker, interval)] = hist
+    if not to_poll:
+        return {}, {}
+    updates, errors = poll_new_bars(to_poll, interval)
+    for ticker, (merged, _) in updates.items():
+        live_frames[(ticker, interval)] = merged
+    return {ticker: new_bars for ticker, (_, new_bars) in updates.items()}, errors
+
+# Chart live single ticker (dijalankan sebagai fragment yang di-rerun berkala).
+# Figure dibuat sekali lalu hanya datanya yang diganti setiap polling.
+def render_live_chart(ticker, interval, hist):
+    # Rerun fragment dicatat sebagai trace sendiri; saat rerun penuh ikut trace halaman
+    trace = start_trace('live', ticker=ticker, interval=interval) if current_trace() is None else None
+    new_bars, errors = refresh_live_frames({ticker: hist}, interval)
+    window = st.session_state['live_frames'][(ticker, interval)].iloc[-LIVE_WINDOW_BARS:]
     
-    # Volume bars
-    colors = ['#26a69a' if close >= open else '#ef5350' 
-              for close, open in zip(data['Close'], data['Open'])]
+    live_figure = st.session_state.get('live_figure')
+    if live_figure is None or live_figure[0] != (ticker, interval):
+        fig = create_candlestick_chart(window, ticker)
+        fig.update_layout(height=500, uirevision=f"{ticker}_{interval}")
+        st.session_state['live_figure'] = ((ticker, interval), fig)
+    else:
+        fig = update_candlestick_chart(live_figure[1], window)
     
-    fig.add_trace(
-        go.Bar(
-            x=data.index,
-            y=data['Volume'],
-            name='Volume',
-            marker_color=colors,
-            showlegend=False
-        ),
-        row=2, col=1
+    if ticker in errors:
+        st.warning(f"⚠️ Polling gagal: {errors[ticker]}")
+    st.caption(
+        f"🔴 Live · bar terakhir {window.index[-1]:%Y-%m-%d %H:%M} · "
+        f"{new_bars.get(ticker, 0)} bar baru · diperbarui {datetime.now():%H:%M:%S}"
     )
-    
-    # Update layout
-    fig.update_layout(
-        template='plotly_dark',
-        height=700,
-        xaxis_rangeslider_visible=False,
-        hovermode='x unified',
-        plot_bgcolor='#0e1117',
-        paper_bgcolor='#0e1117',
-        font=dict(color='#e0e0e0')
+    show_chart(fig, 'live')
+    if trace is not None:
+        finish_trace(trace)
+
+# Tabel live watchlist: satu request delta kecil per ticker setiap polling
+def render_live_watchlist(frames, interval):
+    trace = start_trace('live_watchlist', tickers=len(frames), interval=interval) if current_trace() is None else None
+    new_bars, errors = refresh_live_frames(frames, interval)
+    live_frames = st.session_state['live_frames']
+    rows = []
+    for ticker in frames:
+        hist = live_frames[(ticker, interval)]
+        last_close = hist['Close'].iloc[-1]
+        prev_close = hist['Close'].iloc[-2] if len(hist) > 1 else last_close
+        rows.append({
+            'Ticker': ticker,
+            'Bar Terakhir': hist.index[-1],
+            'Harga Terakhir': last_close,
+            'Perubahan (%)': (last_close / prev_close - 1) * 100 if prev_close else 0,
+            'Bar Baru': new_bars.get(ticker, 0),
+            'Keterangan': errors.get(ticker, '')
+        })
+    st.caption(f"🔴 Live · diperbarui {datetime.now():%H:%M:%S}")
+    show_table(
+        pd.DataFrame(rows).style.format({'Harga Terakhir': '{:,.2f}', 'Perubahan (%)': '{:+.2f}'}),
+        'live_watchlist',
+        use_container_width=True,
+        hide_index=True
     )
+    if trace is not None:
+        finish_trace(trace)
+
+# Bagian portofolio di mode Watchlist. Statistik korelasi/kovarians disimpan di
+# session per (interval, periode) dan hanya diperbarui untuk bar/ticker yang berubah.
+def render_portfolio(histories, interval, cache_key):
+    cached = st.session_state.get('portfolio_stats')
+    if cached is None or cached[0] != cache_key:
+        cached = (cache_key, PortfolioStats())
+        st.session_state['portfolio_stats'] = cached
+    stats = cached[1]
+    with instrumentation.stage('stats.portfolio', tickers=len(histories)) as record:
+        changes = stats.update(histories)
+        record.update(new_bars=changes['new_bars'], dropped_bars=changes['dropped_bars'], recomputed=len(changes['recomputed']))
+    if len(stats.tickers) < 2:
+        st.info("ℹ️ Butuh minimal dua ticker dengan data untuk analisis portofolio.")
+        return
+    
+    bars_per_year = periods_per_year(interval, next(iter(histories.values())).index)
+    covariance, correlation = stats.matrices(bars_per_year)
+    
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        st.markdown("#### ⚖️ Bobot")
+        weights_df = st.data_editor(
+            pd.DataFrame({'Ticker': stats.tickers, 'Bobot': 1.0}),
+            key=f"portfolio_weights_{hash(tuple(stats.tickers))}",
+            disabled=['Ticker'],
+            hide_index=True,
+            use_container_width=True,
+            height=min(400, 38 + 35 * len(stats.tickers))
+        )
+    weights = dict(zip(weights_df['Ticker'], weights_df['Bobot'].fillna(0).clip(lower=0)))
+    volatility, contribution = portfolio_volatility(covariance, weights)
+    asset_volatility = pd.Series(np.sqrt(np.diag(covariance.to_numpy())), index=covariance.index)
+    normalized = pd.Series(weights).reindex(covariance.index) / max(sum(weights.values()), 1e-12)
+    off_diagonal = correlation.to_numpy()[~np.eye(len(correlation), dtype=bool)]
+    
+    with col2:
+        st.markdown("#### 📊 Ringkasan Portofolio")
+        m1, m2, m3 = st.columns(3)
+        with m1:
+            st.metric("Volatilitas Portofolio (Ann.)", f"{volatility * 100:.2f}%")
+        with m2:
+            st.metric("Rata-rata Korelasi", f"{np.nanmean(off_diagonal):.2f}")
+        with m3:
+            diversification = (normalized * asset_volatility).sum() / volatility if volatility else np.nan
+            st.metric("Rasio Diversifikasi", f"{diversification:.2f}")
+        show_table(
+            pd.DataFrame({
+                'Bobot (%)': normalized * 100,
+                'Volatilitas (Ann. %)': asset_volatility * 100,
+                'Kontribusi Risiko (%)': contribution * 100
+            }).style.format('{:.2f}', na_rep='-'),
+            'portfolio_contribution',
+            use_container_width=True,
+            height=min(400, 38 + 35 * len(stats.tickers))
+        )
     
-    fig.update_xaxes(showgrid=True, gridcolor='#1e2130')
-    fig.update_yaxes(showgrid=True, gridcolor='#1e2130')
+    st.markdown("#### 🔗 Matriks Korelasi Return")
+    show_cached_chart('correlation', (correlation,), lambda: create_correlation_heatmap(correlation), tickers=len(correlation))
     
-    return fig
+    with st.expander("📐 Matriks Kovarians (tahunan)"):
+        show_table(covariance.style.format('{:.6f}', na_rep='-'), 'portfolio_covariance', use_container_width=True)
+        render_export_controls(covariance, f"covariance_{interval}_{datetime.now().strftime('%Y%m%d')}", "covariance_export")
+    
+    # Korelasi rolling terhadap satu ticker acuan atau portofolio berbobot
+    st.markdown("#### 📈 Korelasi Rolling")
+    returns = stats.all_returns()
+    col1, col2, col3 = st.columns([1, 1, 2])
+    with col1:
+        reference = st.selectbox("Acuan", ["Portofolio"] + stats.tickers, key="rolling_corr_reference")
+    with col2:
+        window = st.number_input(
+            "Rolling Window (bar)",
+            min_value=5,
+            max_value=max(5, len(returns)),
+            value=min(63, max(5, len(returns) // 4)),
+            step=1,
+            key="rolling_corr_window"
+        )
+    candidates = [ticker for ticker in stats.tickers if ticker != reference]
+    with col3:
+        selected = st.multiselect("Ticker", candidates, default=candidates[:5], key="rolling_corr_tickers")
+    if selected:
+        def build_rolling_correlation():
+            if reference == "Portofolio":
+                reference_returns = returns.fillna(0.0) @ normalized.fillna(0.0)
+            else:
+                reference_returns = returns[reference]
+            with instrumentation.stage('stats.rolling_correlation', rows=len(returns), tickers=len(selected)):
+                rolling = rolling_correlation(returns[selected], reference_returns, window)
+            return create_rolling_correlation_chart(rolling, MAX_RENDER_POINTS)
+        
+        key_parts = (returns, reference, window, selected, normalized if reference == "Portofolio" else None)
+        show_cached_chart('rolling_correlation', key_parts, build_rolling_correlation, tickers=len(selected))
 
-# Main content
+# Kembali ke halaman pertama tabel saat filter/urutan berubah
+def reset_table_page():
+    st.session_state['table_page'] = 1
+
+# Jumlah titik maksimum yang dikirim ke browser (kira-kira lebar chart dalam piksel)
+MAX_RENDER_POINTS = 2000
+MAX_RENDER_CANDLES = 500
+
+# Simpan request terakhir agar hasil tetap tampil saat widget lain (mis. zoom) memicu rerun
 if scrape_button:
-    with st.spinner(f'🔄 Mengambil data untuk {ticker_input}...'):
+    # Filter tabel dari data sebelumnya tidak berlaku untuk data baru
+    for table_key in ('table_range', 'table_page', 'live_frames', 'live_figure'):
+        st.session_state.pop(table_key, None)
+    st.session_state['scrape_request'] = {
+        'mode': scrape_mode,
+        'ticker': ticker_input,
+        'watchlist': watchlist_input,
+        'period': period,
+        'interval': interval,
+        'start': start_date,
+        'end': end_date
+    }
+
+scrape_request = st.session_state.get('scrape_request')
+if scrape_request:
+    scrape_mode = scrape_request['mode']
+    ticker_input = scrape_request['ticker']
+    watchlist_input = scrape_request['watchlist']
+    period = scrape_request['period']
+    interval = scrape_request['interval']
+    start_date = scrape_request['start']
+    end_date = scrape_request['end']
+
+# Live hanya masuk akal jika rentang data sampai hari ini
+live_available = bool(period) or (end_date is not None and end_date >= datetime.now().date())
+if live_mode and scrape_request and not live_available:
+    st.info("ℹ️ Mode live hanya berlaku untuk periode preset atau tanggal akhir hari ini.")
+
+# Setiap rerun dengan request aktif dicatat sebagai satu trace
+trace = start_trace(
+    'scrape',
+    measure_payload=debug_panel,
+    mode=scrape_mode,
+    ticker=ticker_input,
+    interval=interval,
+    period=period
+) if scrape_request else None
+
+# Main content
+if scrape_request and scrape_mode == "Screener":
+    tickers = parse_tickers(watchlist_input)
+    
+    if not tickers:
+        st.warning("⚠️ Masukkan minimal satu ticker symbol.")
+    else:
+        # Histori diambil lewat cache/store yang sama dengan mode lain, lalu metrik dihitung paralel per core
+        start_time = time.perf_counter()
+        with st.spinner(f'🔄 Mengambil data untuk {len(tickers)} ticker...'):
+            with instrumentation.stage('fetch.multi_history', tickers=len(tickers)):
+                multi_data, multi_errors = get_multi_stock_data(tickers, period, interval, start_date, end_date)
+        fetch_elapsed = time.perf_counter() - start_time
+        with st.spinner('🧮 Menghitung metrik screener...'):
+            with instrumentation.stage('stats.screener', tickers=len(multi_data)):
+                ranking = screen_universe(multi_data, interval)
+        screen_elapsed = time.perf_counter() - start_time - fetch_elapsed
+        
+        st.success(
+            f"✅ {len(ranking)} dari {len(tickers)} ticker disaring "
+            f"(ambil data {fetch_elapsed:.1f} detik, hitung metrik {screen_elapsed:.2f} detik)"
+        )
+        if multi_errors:
+            st.warning(f"⚠️ {len(multi_errors)} ticker gagal diambil: {', '.join(t for t in tickers if t in multi_errors)}")
+        
+        if not ranking.empty:
+            st.markdown("### 🏆 Ranking Screener")
+            sort_col1, sort_col2 = st.columns([3, 1])
+            with sort_col1:
+                rank_by = st.selectbox(
+                    "Ranking berdasarkan",
+                    [col for col in ranking.columns if col not in ('Rank', 'Ticker')],
+                    index=list(ranking.columns).index('Sharpe Ratio (Ann.)') - 2,
+                    key="screener_sort"
+                )
+            with sort_col2:
+                rank_order = st.radio("Urutan", ["Turun", "Naik"], horizontal=True, key="screener_order")
+            ranking = ranking.sort_values(rank_by, ascending=rank_order == "Naik", na_position='last')
+            ranking['Rank'] = np.arange(1, len(ranking) + 1)
+            show_table(
+                ranking.style.format({
+                    'Last Close': '{:,.2f}',
+                    'Total Return (%)': '{:+.2f}',
+                    'Volatility (Ann. %)': '{:.2f}',
+                    'Sharpe Ratio (Ann.)': '{:.2f}',
+                    'Dist. 52w High (%)': '{:+.2f}',
+                    'Dist. 52w Low (%)': '{:+.2f}',
+                    'Avg Volume': '{:,.0f}'
+                }, na_rep='-'),
+                'screener_ranking',
+                use_container_width=True,
+                hide_index=True,
+                height=min(600, 38 + 35 * len(ranking))
+            )
+            render_export_controls(
+                ranking.set_index('Ticker'),
+                f"screener_{interval}_{datetime.now().strftime('%Y%m%d')}",
+                "screener_export"
+            )
+
+elif scrape_request and scrape_mode == "Watchlist":
+    tickers = parse_tickers(watchlist_input)
+    
+    if not tickers:
+        st.warning("⚠️ Masukkan minimal satu ticker symbol.")
+    else:
+        start_time = time.perf_counter()
+        with st.spinner(f'🔄 Mengambil data untuk {len(tickers)} ticker...'):
+            with instrumentation.stage('fetch.multi_history', tickers=len(tickers)):
+                multi_data, multi_errors = get_multi_stock_data(tickers, period, interval, start_date, end_date)
+        elapsed = time.perf_counter() - start_time
+        
+        if multi_data:
+            st.success(f"✅ {len(multi_data)} dari {len(tickers)} ticker berhasil diambil dalam {elapsed:.1f} detik")
+        if multi_errors:
+            st.warning(f"⚠️ {len(multi_errors)} ticker gagal diambil: {', '.join(t for t in tickers if t in multi_errors)}")
+        
+        if live_mode and multi_data and live_available:
+            st.markdown("### 🔴 Harga Live")
+            st.experimental_fragment(run_every=live_seconds)(render_live_watchlist)(multi_data, interval)
+        
+        # Ringkasan status per ticker
+        st.markdown("### 📋 Ringkasan Watchlist")
+        summary_rows = []
+        for ticker in tickers:
+            if ticker in multi_data:
+                hist = multi_data[ticker]
+                first_close = hist['Close'].iloc[0]
+                last_close = hist['Close'].iloc[-1]
+                summary_rows.append({
+                    'Ticker': ticker,
+                    'Status': '✅ Berhasil',
+                    'Jumlah Bar': len(hist),
+                    'Harga Terakhir': last_close,
+                    'Total Return (%)': ((last_close - first_close) / first_close) * 100 if first_close != 0 else 0,
+                    'Keterangan': ''
+                })
+            else:
+                summary_rows.append({
+                    'Ticker': ticker,
+                    'Status': '❌ Gagal',
+                    'Jumlah Bar': 0,
+                    'Harga Terakhir': None,
+                    'Total Return (%)': None,
+                    'Keterangan': multi_errors.get(ticker, '')
+                })
+        summary_df = pd.DataFrame(summary_rows)
+        show_table(
+            summary_df.style.format({
+                'Harga Terakhir': '{:,.2f}',
+                'Total Return (%)': '{:+.2f}'
+            }, na_rep='-'),
+            'watchlist_summary',
+            use_container_width=True,
+            hide_index=True
+        )
+        
+        # Download harga penutupan semua ticker
+        if multi_data:
+            close_df = pd.DataFrame({ticker: multi_data[ticker]['Close'] for ticker in tickers if ticker in multi_data})
+            render_export_controls(close_df, f"watchlist_close_{datetime.now().strftime('%Y%m%d')}", "watchlist_export")
+            
+            st.markdown("### 🧮 Portofolio")
+            render_portfolio(multi_data, interval, (interval, period, start_date, end_date))
+
+elif scrape_request:
+    # Info perusahaan diambil paralel dan baru ditunggu saat tab Company Info dirender
+    info_future = start_company_info_fetch(ticker_input)
+    
+    # Peringatan jika rentang intraday melewati batas histori Yahoo
+    if interval in INTRADAY_LIMITS:
+        requested_start = resolve_fetch_start(period, start_date)
+        earliest = get_intraday_earliest(interval)
+        if requested_start is None or requested_start < earliest:
+            st.warning(f"⚠️ Data interval {interval} hanya tersedia sejak {earliest:%Y-%m-%d}. Data sebelum tanggal tersebut tidak dapat diambil.")
+    
+    with st.spinner(f'🔄 Mengambil data untuk {ticker_input}...'), instrumentation.stage('fetch.history', ticker=ticker_input) as fetch_record:
         if period:
-            hist_data, info_data = get_stock_data(ticker_input, period, interval, None, None)
+            hist_data, fetch_error = get_stock_data(ticker_input, period, interval, None, None)
         else:
-            hist_data, info_data = get_stock_data(ticker_input, None, interval, start_date, end_date)
+            hist_data, fetch_error = get_stock_data(ticker_input, None, interval, start_date, end_date)
+        fetch_record['rows'] = 0 if hist_data is None else len(hist_data)
     
     if hist_data is not None and not hist_data.empty:
         st.success(f"✅ Data berhasil diambil untuk {ticker_input}!")
         
+        if live_mode and live_available:
+            # Bar yang sudah ditambahkan mode live ikut dipakai tab-tab di bawah
+            live_hist = st.session_state.get('live_frames', {}).get((ticker_input, interval))
+            if live_hist is not None and live_hist.index[-1] >= hist_data.index[-1]:
+                hist_data = live_hist
+            st.markdown("### 🔴 Live Chart")
+            st.experimental_fragment(run_every=live_seconds)(render_live_chart)(ticker_input, interval, hist_data)
+        
         # Tabs untuk organisasi konten
         tab1, tab2, tab3, tab4, tab5 = st.tabs([
             "📊 Overview", 
@@ -250,47 +768,127 @@ if scrape_button:
             
             # Mini chart
             st.markdown("### 📈 Price Movement")
-            fig_mini = go.Figure()
-            fig_mini.add_trace(go.Scatter(
-                x=hist_data.index,
-                y=hist_data['Close'],
-                mode='lines',
-                name='Close Price',
-                line=dict(color='#667eea', width=2),
-                fill='tozeroy',
-                fillcolor='rgba(102, 126, 234, 0.1)'
-            ))
-            fig_mini.update_layout(
-                template='plotly_dark',
-                height=600,
-                hovermode='x unified',
-                plot_bgcolor='#0e1117',
-                paper_bgcolor='#0e1117',
-                font=dict(color='#e0e0e0'),
-                showlegend=False,
-                xaxis=dict(showgrid=True, gridcolor='#1e2130'),
-                yaxis=dict(showgrid=True, gridcolor='#1e2130')
+            show_cached_chart(
+                'price_line',
+                (hist_data, fast_render),
+                lambda: create_price_line_chart(hist_data['Close'], MAX_RENDER_POINTS if fast_render else None),
+                rows=len(hist_data)
             )
-            st.plotly_chart(fig_mini, use_container_width=True)
         
         # Tab 2: Chart
         with tab2:
             st.markdown("### 🕯️ Candlestick Chart")
-            candlestick_fig = create_candlestick_chart(hist_data, ticker_input)
-            st.plotly_chart(candlestick_fig, use_container_width=True)
+            
+            indicator_names = st.multiselect(
+                "📐 Indikator Teknikal",
+                list(INDICATORS),
+                key="chart_indicators"
+            )
+            indicator_params = {}
+            if indicator_names:
+                with st.expander("⚙️ Parameter Indikator"):
+                    param_cols = st.columns(len(indicator_names))
+                    for col, name in zip(param_cols, indicator_names):
+                        with col:
+                            indicator_params[name] = indicator_param_inputs(name)
+            
+            chart_window = slice(None)
+            if fast_render and len(hist_data) > MAX_RENDER_CANDLES:
+                # Zoom memotong data resolusi penuh yang sudah ada, lalu di-downsample ulang
+                local_index = hist_data.index.tz_localize(None) if hist_data.index.tz is not None else hist_data.index
+                zoom_start, zoom_end = st.slider(
+                    "🔍 Rentang Zoom",
+                    min_value=local_index[0].to_pydatetime(),
+                    max_value=local_index[-1].to_pydatetime(),
+                    value=(local_index[0].to_pydatetime(), local_index[-1].to_pydatetime()),
+                    format="YYYY-MM-DD HH:mm",
+                    key=f"zoom_{ticker_input}_{interval}"
+                )
+                # Potongan posisi (view), bukan mask boolean yang menyalin histori
+                chart_window = slice(local_index.searchsorted(zoom_start), local_index.searchsorted(zoom_end, side='right'))
+                zoom_rows = len(range(len(hist_data))[chart_window])
+                if zoom_rows > MAX_RENDER_CANDLES:
+                    st.caption(f"Bar digabung menjadi ±{MAX_RENDER_CANDLES:,} candle dari {zoom_rows:,} bar. Persempit rentang zoom untuk detail penuh.")
+            
+            chart_data = hist_data.iloc[chart_window]
+            
+            def build_candlestick():
+                # Indikator dihitung pada histori penuh (inkremental lewat cache) lalu dipotong
+                # sesuai rentang zoom, agar nilai awal rentang tidak kehilangan warm-up
+                chart_indicators = {}
+                with instrumentation.stage('indicators', count=len(indicator_params)):
+                    for name, params in indicator_params.items():
+                        values = compute_indicator(ticker_input, interval, hist_data, name, params)
+                        chart_indicators[name] = values.iloc[chart_window]
+                return create_candlestick_chart(
+                    chart_data,
+                    ticker_input,
+                    MAX_RENDER_CANDLES if fast_render else None,
+                    chart_indicators
+                )
+            
+            show_cached_chart(
+                'candlestick',
+                (hist_data, ticker_input, chart_window.start, chart_window.stop, fast_render, indicator_params),
+                build_candlestick,
+                rows=len(chart_data)
+            )
             
             
         # Tab 3: Data Table
         with tab3:
             st.markdown("### 📋 Historical Data")
             
+            # Kontrol tabel: filter dan urutan diproses di data layer, hanya satu halaman yang diformat
+            local_index = hist_data.index.tz_localize(None) if hist_data.index.tz is not None else hist_data.index
+            col1, col2, col3, col4 = st.columns([2, 2, 1, 1])
+            with col1:
+                table_range = st.date_input(
+                    "Rentang Tanggal",
+                    value=(local_index[0].date(), local_index[-1].date()),
+                    min_value=local_index[0].date(),
+                    max_value=local_index[-1].date(),
+                    key="table_range",
+                    on_change=reset_table_page
+                )
+            with col2:
+                sort_column = st.selectbox(
+                    "Urutkan Berdasarkan",
+                    ['Date', 'Open', 'High', 'Low', 'Close', 'Volume'],
+                    key="table_sort",
+                    on_change=reset_table_page
+                )
+            with col3:
+                sort_order = st.selectbox("Urutan", ["Naik", "Turun"], key="table_order", on_change=reset_table_page)
+            with col4:
+                page_size = st.selectbox("Baris/Halaman", [50, 100, 250, 500], index=1, key="table_page_size", on_change=reset_table_page)
+            
+            # Saat rentang baru dipilih sebagian, date_input hanya berisi tanggal awal
+            table_start = table_range[0] if len(table_range) > 0 else None
+            table_end = table_range[1] + timedelta(days=1) if len(table_range) > 1 else None
+            _, total_rows = query_history_page(hist_data, 1, 0, start=table_start, end=table_end)
+            total_pages = max(1, -(-total_rows // page_size))
+            # Nilai awal diisi lewat session state (bukan value=) karena reset_table_page juga menulis key ini
+            st.session_state.setdefault('table_page', 1)
+            page = st.number_input(f"Halaman (dari {total_pages:,})", min_value=1, max_value=total_pages, step=1, key="table_page")
+            
+            with instrumentation.stage('table.query', rows=len(hist_data)):
+                page_df, total_rows = query_history_page(
+                    hist_data,
+                    page,
+                    page_size,
+                    sort_by=None if sort_column == 'Date' else sort_column,
+                    ascending=sort_order == "Naik",
+                    start=table_start,
+                    end=table_end
+                )
+            
             # Format dataframe
-            display_df = hist_data.copy()
-            display_df = display_df.reset_index()
+            display_df = page_df.reset_index()
             display_df.columns = [col.replace('_', ' ').title() if col != 'Date' else 'Date' 
                                   for col in display_df.columns]
             
-            st.dataframe(
+            show_table(
                 display_df.style.format({
                     'Open': '{:,.2f}',
                     'High': '{:,.2f}',
@@ -298,18 +896,16 @@ if scrape_button:
                     'Close': '{:,.2f}',
                     'Volume': '{:,.0f}'
                 }),
+                'history_table',
                 use_container_width=True,
+                hide_index=True,
                 height=400
             )
+            first_row = (page - 1) * page_size + 1 if total_rows else 0
+            st.caption(f"Menampilkan baris {first_row:,}–{min(page * page_size, total_rows):,} dari {total_rows:,}")
             
             # Download button
-            csv = hist_data.to_csv()
-            st.download_button(
-                label="📥 Download Data as CSV",
-                data=csv,
-                file_name=f"{ticker_input}_data_{datetime.now().strftime('%Y%m%d')}.csv",
-                mime="text/csv"
-            )
+            render_export_controls(hist_data, f"{ticker_input}_data_{datetime.now().strftime('%Y%m%d')}", "history_export")
         
         # Tab 4: Statistics
         with tab4:
@@ -329,39 +925,101 @@ if scrape_button:
             
             # Returns calculation
             st.markdown("#### 📈 Returns Analysis")
-            hist_data['Daily_Return'] = hist_data['Close'].pct_change() * 100
+            bars_per_year = periods_per_year(interval, hist_data.index)
+            with instrumentation.stage('stats.returns', rows=len(hist_data)):
+                return_stats = compute_return_stats(hist_data, bars_per_year)
+            daily_return = return_stats['daily_return']
             
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("Avg Daily Return", f"{hist_data['Daily_Return'].mean():.2f}%")
+                st.metric("Avg Daily Return", f"{return_stats['avg_return']:.2f}%")
             with col2:
-                st.metric("Volatility (Std)", f"{hist_data['Daily_Return'].std():.2f}%")
+                st.metric("Volatility (Std)", f"{return_stats['volatility']:.2f}%")
             with col3:
-                sharpe = (hist_data['Daily_Return'].mean() / hist_data['Daily_Return'].std()) * (252 ** 0.5) if hist_data['Daily_Return'].std() != 0 else 0
-                st.metric("Sharpe Ratio (Ann.)", f"{sharpe:.2f}")
+                st.metric("Sharpe Ratio (Ann.)", f"{return_stats['sharpe']:.2f}")
             
             # Returns distribution
-            fig_returns = go.Figure()
-            fig_returns.add_trace(go.Histogram(
-                x=hist_data['Daily_Return'].dropna(),
-                nbinsx=50,
-                name='Daily Returns',
-                marker_color='#667eea'
-            ))
-            fig_returns.update_layout(
-                title='Distribution of Daily Returns',
-                template='plotly_dark',
-                height=400,
-                plot_bgcolor='#0e1117',
-                paper_bgcolor='#0e1117',
-                font=dict(color='#e0e0e0')
+            show_cached_chart(
+                'returns_histogram',
+                (hist_data,),
+                lambda: create_returns_histogram(daily_return),
+                rows=len(daily_return)
+            )
+            
+            # Metrik risiko rolling
+            st.markdown("#### ⚠️ Risk Metrics")
+            col1, col2 = st.columns(2)
+            with col1:
+                risk_window = st.number_input(
+                    "Rolling Window (bar)",
+                    min_value=5,
+                    max_value=max(5, len(hist_data)),
+                    value=min(63, max(5, len(hist_data) // 4)),
+                    step=1,
+                    help="Jumlah bar untuk volatilitas, Sharpe/Sortino, VaR dan CVaR rolling"
+                )
+            with col2:
+                risk_level = st.selectbox(
+                    "Confidence Level VaR/CVaR",
+                    [0.90, 0.95, 0.99],
+                    index=1,
+                    format_func=lambda level: f"{level:.0%}"
+                )
+            
+            with instrumentation.stage('stats.risk_summary', rows=len(hist_data)):
+                risk = risk_summary(hist_data['Close'], bars_per_year, risk_level).iloc[0]
+            col1, col2, col3, col4, col5 = st.columns(5)
+            with col1:
+                st.metric("Max Drawdown", f"{risk['Max Drawdown'] * 100:.2f}%")
+            with col2:
+                st.metric("Max DD Duration", f"{risk['Max DD Duration (bars)']:,.0f} bar")
+            with col3:
+                st.metric(f"VaR {risk_level:.0%}", f"{risk['VaR'] * 100:.2f}%")
+            with col4:
+                st.metric(f"CVaR {risk_level:.0%}", f"{risk['CVaR'] * 100:.2f}%")
+            with col5:
+                st.metric("Sortino Ratio (Ann.)", f"{risk['Sortino (Ann.)']:.2f}")
+            
+            def build_risk_chart():
+                with instrumentation.stage('stats.rolling_risk', rows=len(hist_data)):
+                    returns = simple_returns(hist_data['Close'])
+                    rolling_metrics = {
+                        (1, 'Volatility (Ann.)', '#667eea'): rolling_volatility(returns, risk_window, bars_per_year) * 100,
+                        (2, 'Sharpe (Ann.)', '#26a69a'): rolling_sharpe(returns, risk_window, bars_per_year),
+                        (2, 'Sortino (Ann.)', '#ffa726'): rolling_sortino(returns, risk_window, bars_per_year),
+                        (3, 'Drawdown', '#ef5350'): drawdown(hist_data['Close']) * 100,
+                        (4, f'VaR {risk_level:.0%}', '#ffa726'): rolling_value_at_risk(returns, risk_window, risk_level) * 100,
+                        (4, f'CVaR {risk_level:.0%}', '#ef5350'): rolling_conditional_value_at_risk(returns, risk_window, risk_level) * 100
+                    }
+                return create_risk_chart(
+                    rolling_metrics,
+                    (
+                        f'Rolling Volatility (%, {risk_window} bar)',
+                        f'Rolling Sharpe & Sortino ({risk_window} bar)',
+                        'Drawdown (%)',
+                        f'Rolling VaR & CVaR (%, {risk_window} bar)'
+                    ),
+                    MAX_RENDER_POINTS if fast_render else None
+                )
+            
+            show_cached_chart(
+                'risk',
+                (hist_data, risk_window, risk_level, bars_per_year, fast_render),
+                build_risk_chart,
+                rows=len(hist_data)
             )
-            st.plotly_chart(fig_returns, use_container_width=True)
         
         # Tab 5: Company Info
         with tab5:
             st.markdown("### ℹ️ Company/Asset Information")
             
+            with st.spinner("🔄 Memuat info perusahaan..."):
+                try:
+                    with instrumentation.stage('fetch.company_info_wait', ticker=ticker_input):
+                        info_data = info_future.result()
+                except Exception as e:
+                    info_data = None
+            
             if info_data:
                 col1, col2 = st.columns(2)
                 
@@ -411,12 +1069,32 @@ if scrape_button:
     elif hist_data is not None and hist_data.empty:
         st.error(f"❌ Tidak ada data yang ditemukan untuk ticker {ticker_input}. Pastikan ticker dan periode yang dipilih benar.")
     else:
-        st.error(f"❌ Gagal mengambil data untuk ticker {ticker_input}. Periksa kembali ticker symbol.")
+        st.error(f"❌ Gagal mengambil data untuk ticker {ticker_input}: {fetch_error}")
+        st.info("💡 Periksa kembali ticker symbol, atau coba lagi beberapa saat jika Yahoo Finance sedang membatasi request.")
 
 else:
     # Welcome screen
     st.info("👆 Masukkan ticker symbol di sidebar dan klik tombol 'Ekstrak Data' untuk memulai!")
 
+if trace is not None:
+    finish_trace(trace)
+    if debug_panel:
+        render_debug_panel(trace)
+
+# Statistik cache untuk memantau pemakaian memori
+with st.sidebar:
+    with st.expander("📦 Cache Histori"):
+        cache_stats = get_history_cache().stats()
+        st.metric("Hit Ratio", f"{cache_stats['hit_ratio']:.0%}")
+        st.metric(
+            "Memori Terpakai",
+            f"{cache_stats['resident_bytes'] / 1024 ** 2:,.1f} / {cache_stats['max_bytes'] / 1024 ** 2:,.0f} MB"
+        )
+        st.caption(
+            f"{cache_stats['entries']} entri · {cache_stats['hits']} hit · {cache_stats['misses']} miss · "
+            f"{cache_stats['evictions']} eviction · {cache_stats['expirations']} expired"
+        )
+
 # Footer
 st.markdown("---")
 st.markdown("""